@@ -0,0 +1,72 @@
+"""Times the three stages of grading on the parametric families of dsl.families.
+
+Run as `uv run benchmarks/scaling.py [--max-size N]`. For every family and size it
+reports how long the builder takes to run (DSL execution), how long parse_program and
+get_program_cost take (cost) and how long compare_graphs takes against a randomly
+relabeled copy of the graph (isomorphism), which is what grading a correct but
+differently numbered answer costs. VF2 dominates; on the vertex-transitive families
+(prisms, generalized Petersen graphs, crowns) it grows quickly past 1,000 vertices.
+"""
+
+from pathlib import Path
+import argparse
+import random
+import sys
+import time
+
+# Run as `uv run benchmarks/scaling.py`, so the repo root is not on the path.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dsl import compare_graphs, get_program_cost, parse_program  # noqa: E402
+from dsl.families import FamilyInstance, family_instances  # noqa: E402
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def _relabeled(graph, seed: int = 0):
+    vertices, edges = graph
+    labels = list(vertices)
+    random.Random(seed).shuffle(labels)
+    relabel = dict(zip(vertices, labels))
+    return [relabel[v] for v in vertices], [(relabel[a], relabel[b]) for a, b in edges]
+
+
+def benchmark(instance: FamilyInstance) -> dict[str, object]:
+    fn = instance.builder()
+    graph, build_s = _timed(fn)
+    _, cost_s = _timed(lambda: get_program_cost(parse_program(fn)))
+    other = _relabeled(graph)
+    comparison, iso_s = _timed(lambda: compare_graphs(other, graph))
+    return {
+        "family": instance.family,
+        "size": instance.size,
+        "vertices": len(graph[0]),
+        "edges": len(graph[1]),
+        "dsl_s": build_s,
+        "cost_s": cost_s,
+        "isomorphism_s": iso_s,
+        "stage": comparison.stage,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-size", type=int, default=1_000)
+    parser.add_argument("--families", nargs="*", help="default: every family")
+    args = parser.parse_args()
+
+    header = f"{'family':<22}{'|V|':>8}{'|E|':>10}{'dsl':>10}{'cost':>10}{'iso':>10}"
+    print(header)
+    print("-" * len(header))
+    for instance in family_instances(max_size=args.max_size):
+        if args.families and instance.family not in args.families:
+            continue
+        row = benchmark(instance)
+        print(
+            f"{row['family']:<22}{row['vertices']:>8}{row['edges']:>10}"
+            f"{row['dsl_s']:>10.4f}{row['cost_s']:>10.4f}{row['isomorphism_s']:>10.4f}"
+            f"  ({row['stage']})"
+        )
@@ -0,0 +1,326 @@
+"""Micro-benchmarks for the DSL primitives and the grading pipeline.
+
+Run as `uv run benchmarks/suite.py`. Every case is timed at every size in --sizes and
+the results are written as JSON to --out. With --compare BASELINE the results are
+checked against an earlier output file, and the script exits with status 1 if any
+case got slower than --threshold times its baseline. --results FILE compares an
+existing output file instead of running the suite again.
+
+Sizes are vertex counts. The dense cases (complete graphs, adjacency matrices) take
+about sqrt(2 * size) vertices instead, so that every case handles roughly `size`
+edges.
+"""
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import timeit
+
+import numpy as np
+
+# Run as `uv run benchmarks/suite.py`, so the repo root is not on the path.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dsl import (  # noqa: E402
+    DSL,
+    are_graphs_equal,
+    from_adjacency_matrix,
+    get_graph_dsl,
+    get_program_cost,
+    parse_program,
+    run_program,
+    to_edge_array,
+    to_graph,
+)
+from dsl.canonical import compare_with_certificate, graph_certificate  # noqa: E402
+from dsl.families import family_builder, render_family  # noqa: E402
+from eval import evaluate_chat_result  # noqa: E402
+from utils import ChatResult, Sample, Usage  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = (10, 100, 1_000)
+
+# (size, functions of the backend by name) -> the call to time
+Setup = Callable[[int, dict[str, Callable]], Callable[[], Any]]
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Setup
+    max_size: int | None = None
+
+
+@dataclass
+class Timing:
+    case: str
+    size: int
+    backend: str
+    number: int
+    best_s: float
+    median_s: float
+
+
+def _dense(size: int) -> int:
+    return max(3, math.isqrt(2 * size))
+
+
+def _relabeled(graph):
+    vertices, edges = graph
+    labels = list(vertices)
+    random.Random(0).shuffle(labels)
+    relabel = dict(zip(vertices, labels))
+    return [relabel[v] for v in vertices], [(relabel[a], relabel[b]) for a, b in edges]
+
+
+def _on_cycle(op: Callable[[dict[str, Callable], Any, int], Any]) -> Setup:
+    """Times op on a cycle of the given size, built outside the timed call."""
+
+    def setup(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+        g = f["cycle_graph"](n)
+        return lambda: op(f, g, n)
+
+    return setup
+
+
+def _overlapping_union(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    g, h = f["cycle_graph"](n), f["path_graph"](n // 2, n + n // 2)
+    return lambda: f["union_graphs"](g, h)
+
+
+def _half_edges(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    g = f["cycle_graph"](n)
+    edges = [(i, i + 1) for i in range(0, n - 1, 2)]
+    return lambda: f["remove_edges"](g, *edges)
+
+
+def _chords(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    g = f["cycle_graph"](n)
+    edges = [(i, i + 2) for i in range(0, n - 2, 2)]
+    return lambda: f["add_edges"](g, *edges)
+
+
+def _evaluate_chat_result(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    """A correct answer for a prism of size n, graded end to end."""
+    source = render_family("prism", n).replace(f"def prism_{n}(", "def compress(", 1)
+    response = ChatResult(
+        model="benchmark",
+        content=f"```python\n{source}```",
+        finish_reason="stop",
+        usage=Usage(0, 0, 0, 0, 0),
+        id="benchmark",
+    )
+    graph = family_builder("prism", n)()
+    num_vertices, edges = to_edge_array(graph)
+    sample = Sample(
+        f"prism_{n}", None, 0, 0, 0.0, "", num_vertices=num_vertices, edges=edges
+    )
+    return lambda: evaluate_chat_result(response, sample, 0, graph)
+
+
+def _parse(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    builder = family_builder("generalized_petersen", n)
+    return lambda: parse_program(builder)
+
+
+def _cost(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    program = parse_program(family_builder("generalized_petersen", n))
+    return lambda: get_program_cost(program)
+
+
+def _run_program(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    program = parse_program(family_builder("generalized_petersen", n))
+    dsl = DSL(list(f.values()), [])
+    return lambda: run_program(program, dsl)
+
+
+def _adjacency(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    k = _dense(n)
+    matrix = np.ones((k, k), dtype=np.int8) - np.eye(k, dtype=np.int8)
+    return lambda: from_adjacency_matrix(matrix)
+
+
+def _equal_labeled(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    g, h = f["cycle_graph"](n), f["cycle_graph"](n)
+    return lambda: are_graphs_equal(g, h)
+
+
+def _equal_isomorphism(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    g = f["path_graph"](n)
+    h = _relabeled(to_graph(g))
+    return lambda: are_graphs_equal(g, h)
+
+
+def _certified_isomorphism(n: int, f: dict[str, Callable]) -> Callable[[], Any]:
+    """Same comparison as are_graphs_equal[isomorphism], against a certificate."""
+    g = to_graph(f["path_graph"](n))
+    h = _relabeled(g)
+    certificate = graph_certificate(g)
+    return lambda: compare_with_certificate(h, g, certificate)
+
+
+CASES: list[Case] = [
+    # every function of the DSL
+    Case("path_graph", lambda n, f: lambda: f["path_graph"](n)),
+    Case("cycle_graph", lambda n, f: lambda: f["cycle_graph"](n)),
+    Case("complete_graph", lambda n, f: lambda: f["complete_graph"](_dense(n))),
+    Case(
+        "fully_connect",
+        lambda n, f: lambda: f["fully_connect"](*range(_dense(n))),
+    ),
+    Case(
+        "connect_one_to_all",
+        lambda n, f: lambda: f["connect_one_to_all"](0, *range(1, n)),
+    ),
+    Case("shift_graph", _on_cycle(lambda f, g, n: f["shift_graph"](g, n))),
+    Case("union_graphs", _overlapping_union),
+    Case(
+        "union_map",
+        lambda n, f: lambda: f["union_map"](
+            f["numerical_range"](n), lambda i: f["connect_one_to_all"](i, i + 1)
+        ),
+    ),
+    Case(
+        "merge_vertices", _on_cycle(lambda f, g, n: f["merge_vertices"](g, 0, n // 2))
+    ),
+    Case("remove_vertex", _on_cycle(lambda f, g, n: f["remove_vertex"](g, n // 2))),
+    Case("add_edges", _chords),
+    Case("remove_edges", _half_edges),
+    Case("vertices", lambda n, f: lambda: f["vertices"](n)),
+    Case("numerical_range", lambda n, f: lambda: f["numerical_range"](n)),
+    # parsing, costing and grading
+    Case("parse_program", _parse),
+    Case("get_program_cost", _cost),
+    Case("run_program", _run_program),
+    Case("from_adjacency_matrix", _adjacency),
+    Case("are_graphs_equal[labeled]", _equal_labeled),
+    Case("are_graphs_equal[isomorphism]", _equal_isomorphism, max_size=1_000),
+    Case("certificate[isomorphism]", _certified_isomorphism, max_size=1_000),
+    Case("evaluate_chat_result", _evaluate_chat_result, max_size=1_000),
+]
+
+
+def time_case(case: Case, size: int, backend: str, repeat: int = 5) -> Timing:
+    functions = {fn.__name__: fn for fn in get_graph_dsl(backend).functions}
+    timer = timeit.Timer(case.setup(size, functions))
+    number, _ = timer.autorange()
+    per_call = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return Timing(
+        case.name,
+        size,
+        backend,
+        number,
+        min(per_call),
+        statistics.median(per_call),
+    )
+
+
+def run_suite(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    backend: str = "python",
+    cases: list[Case] = CASES,
+    repeat: int = 5,
+) -> list[Timing]:
+    return [
+        time_case(case, size, backend, repeat)
+        for case in cases
+        for size in sizes
+        if case.max_size is None or size <= case.max_size
+    ]
+
+
+def save_results(timings: list[Timing], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "timings": [asdict(t) for t in timings],
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_results(path: Path) -> list[Timing]:
+    with open(path) as f:
+        return [Timing(**t) for t in json.load(f)["timings"]]
+
+
+@dataclass
+class Regression:
+    case: str
+    size: int
+    backend: str
+    baseline_s: float
+    current_s: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_s / self.baseline_s
+
+
+def compare(
+    current: list[Timing], baseline: list[Timing], threshold: float = 1.25
+) -> list[Regression]:
+    """Cases whose best time grew past threshold times the baseline's. Cases missing
+    from either side are ignored."""
+    before = {(t.case, t.size, t.backend): t.best_s for t in baseline}
+    regressions = []
+    for t in current:
+        baseline_s = before.get((t.case, t.size, t.backend))
+        if baseline_s and t.best_s > threshold * baseline_s:
+            regressions.append(
+                Regression(t.case, t.size, t.backend, baseline_s, t.best_s)
+            )
+    return regressions
+
+
+def _print_table(timings: list[Timing]) -> None:
+    header = f"{'case':<32}{'size':>8}{'best':>12}{'median':>12}"
+    print(header)
+    print("-" * len(header))
+    for t in timings:
+        print(
+            f"{t.case:<32}{t.size:>8}"
+            f"{t.best_s * 1e6:>10.1f}us{t.median_s * 1e6:>10.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--backend", default="python")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=Path, default=RESULTS_DIR / "latest.json")
+    parser.add_argument("--results", type=Path, help="compare this file, don't run")
+    parser.add_argument("--compare", type=Path, metavar="BASELINE")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    if args.results is not None:
+        timings = load_results(args.results)
+    else:
+        timings = run_suite(tuple(args.sizes), args.backend, repeat=args.repeat)
+        save_results(timings, args.out)
+        print(f"Wrote {args.out}")
+    _print_table(timings)
+
+    if args.compare is not None:
+        regressions = compare(timings, load_results(args.compare), args.threshold)
+        for r in regressions:
+            print(
+                f"REGRESSION {r.case} size={r.size} ({r.backend}): "
+                f"{r.baseline_s * 1e6:.1f}us -> {r.current_s * 1e6:.1f}us "
+                f"({r.ratio:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.2f}x.")
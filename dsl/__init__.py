@@ -2,7 +2,10 @@ from .dsl import (
     DSL,
     Program,
     parse_program,
+    parse_program_source,
     get_program_cost,
+    program_fingerprint,
+    run_program,
 )
 from .graph_dsl import (
     Vertex,
@@ -26,13 +29,30 @@ from .graph_dsl import (
     vertices,
     GRAPH_DSL,
 )
-from .utils import from_adjacency_matrix, from_graph, are_graphs_equal
+from .compact_graph import CompactGraph, COMPACT_GRAPH_DSL, to_compact, to_graph
+from .lazy_graph import LazyGraph, LAZY_GRAPH_DSL, to_lazy
+from .backends import GRAPH_DSL_BACKENDS, get_graph_dsl
+from .utils import (
+    from_adjacency_matrix,
+    from_graph,
+    from_edge_array,
+    to_edge_array,
+    from_csr,
+    to_csr,
+    are_graphs_equal,
+    compare_graphs,
+    GraphComparison,
+)
+from .canonical import GraphCertificate, graph_certificate, compare_with_certificate
 
 __all__ = [
     "DSL",
     "Program",
     "parse_program",
+    "parse_program_source",
     "get_program_cost",
+    "program_fingerprint",
+    "run_program",
     "Vertex",
     "Edge",
     "EdgeList",
@@ -53,7 +73,25 @@ __all__ = [
     "remove_edges",
     "vertices",
     "GRAPH_DSL",
+    "CompactGraph",
+    "COMPACT_GRAPH_DSL",
+    "to_compact",
+    "to_graph",
+    "LazyGraph",
+    "LAZY_GRAPH_DSL",
+    "to_lazy",
+    "GRAPH_DSL_BACKENDS",
+    "get_graph_dsl",
     "from_adjacency_matrix",
     "from_graph",
+    "from_edge_array",
+    "to_edge_array",
+    "from_csr",
+    "to_csr",
     "are_graphs_equal",
+    "compare_graphs",
+    "GraphComparison",
+    "GraphCertificate",
+    "graph_certificate",
+    "compare_with_certificate",
 ]
@@ -0,0 +1,458 @@
+"""Static size analysis of DSL programs.
+
+analyze_program runs the Program IR from parse_program over an abstract domain
+instead of over graphs: a graph is a SizeBound, an interval of vertex counts, an
+interval of edge counts and the interval of labels its vertices lie in. Integer and
+list arguments are evaluated exactly (ranges stay ranges), including arithmetic on
+lambda parameters, so generators are exact and only union_graphs of overlapping
+graphs, merges and edge edits widen the intervals.
+
+The analysis never builds a graph, so it can rule an answer out (wrong vertex or edge
+count, or too big to build at all) in microseconds. Anything it does not understand
+makes the affected bound unknown (None), never wrong.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable
+import ast
+
+from dsl.dsl import (
+    FunctionAbstraction,
+    FunctionApplication,
+    Program,
+    Term,
+    leaf_expression,
+)
+
+# No more than this many edges in any graph a program builds. A Python edge list
+# takes about 100 bytes per edge, so this is what fits the sandbox's memory limit.
+MAX_PREDICTED_EDGES = 10_000_000
+
+# union_map over more items than this is not unrolled; its bound is unknown. Every
+# item re-evaluates the lambda body (about 8us), which costs more than building the
+# item, so unrolling is only worth it while the whole check stays well under a
+# millisecond.
+MAX_UNROLLED_ITEMS = 64
+
+# Lists longer than this are not built while evaluating arguments.
+MAX_LIST_ITEMS = 100_000
+
+# Integer results past this many bits are not computed (`10 ** 10 ** 9`).
+_MAX_INT_BITS = 64
+
+
+@dataclass(frozen=True)
+class SizeBound:
+    """What is known about a graph without building it. labels is (lo, hi) with every
+    vertex in lo..hi, or None for a graph without vertices."""
+
+    min_vertices: int
+    max_vertices: int
+    min_edges: int
+    max_edges: int
+    labels: tuple[int, int] | None
+
+    @classmethod
+    def exact(
+        cls, vertices: int, edges: int, labels: tuple[int, int] | None
+    ) -> "SizeBound":
+        return cls(vertices, vertices, edges, edges, labels).tightened()
+
+    def tightened(self) -> "SizeBound":
+        """Caps the maxima by what the label interval can hold."""
+        max_vertices = self.max_vertices
+        if self.labels is not None:
+            max_vertices = min(max_vertices, self.labels[1] - self.labels[0] + 1)
+        # at most every pair plus a self-loop on every vertex
+        max_edges = min(self.max_edges, max_vertices * (max_vertices + 1) // 2)
+        return SizeBound(
+            min(self.min_vertices, max_vertices),
+            max_vertices,
+            min(self.min_edges, max_edges),
+            max_edges,
+            self.labels,
+        )
+
+    def shifted(self, offset: int) -> "SizeBound":
+        labels = None
+        if self.labels is not None:
+            labels = (self.labels[0] + offset, self.labels[1] + offset)
+        return SizeBound(
+            self.min_vertices, self.max_vertices, self.min_edges, self.max_edges, labels
+        )
+
+    def mismatch(self, num_vertices: int, num_edges: int) -> str | None:
+        """The count that rules out a graph of this size, or None if it may fit."""
+        if not self.min_vertices <= num_vertices <= self.max_vertices:
+            return "vertex_count"
+        if not self.min_edges <= num_edges <= self.max_edges:
+            return "edge_count"
+        return None
+
+
+@dataclass
+class ProgramAnalysis:
+    # Bound of every instruction's value, None where it is not a graph or unknown.
+    bounds: list[SizeBound | None] = field(default_factory=list)
+    result: SizeBound | None = None
+
+    @property
+    def min_edges_built(self) -> int:
+        """Edges the largest graph the program certainly builds has at least."""
+        return max((b.min_edges for b in self.bounds if b is not None), default=0)
+
+
+class _Unknown(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class _Splat:
+    """`*r` for a range r, passed on unexpanded so that fully_connect(*range(10**6))
+    costs nothing to analyze."""
+
+    values: range
+
+
+def _labels_of(values) -> tuple[int, int] | None:
+    if not len(values):
+        return None
+    if isinstance(values, range):
+        return (min(values[0], values[-1]), max(values[0], values[-1]))
+    return (min(values), max(values))
+
+
+def _distinct(values) -> int:
+    return len(values) if isinstance(values, range) else len(set(values))
+
+
+def _hull(*labels: tuple[int, int] | None) -> tuple[int, int] | None:
+    known = [lab for lab in labels if lab is not None]
+    if not known:
+        return None
+    return (min(lo for lo, _ in known), max(hi for _, hi in known))
+
+
+def _span(start: int, end: int | None = None, step: int = 1) -> range:
+    if end is None:
+        end = start
+        start = 0
+    return range(start, end, step)
+
+
+def _ints(*values) -> None:
+    if not all(isinstance(v, int) for v in values):
+        raise _Unknown
+
+
+def _graph(value) -> SizeBound:
+    if not isinstance(value, SizeBound):
+        raise _Unknown
+    return value
+
+
+## Transfer functions, one per DSL function, on evaluated arguments
+
+
+def _path_graph(*args) -> SizeBound:
+    _ints(*args)
+    r = _span(*args)
+    return SizeBound.exact(len(r), max(len(r) - 1, 0), _labels_of(r))
+
+
+def _cycle_graph(*args) -> SizeBound:
+    _ints(*args)
+    r = _span(*args)
+    return SizeBound.exact(len(r), len(r) if len(r) >= 3 else 0, _labels_of(r))
+
+
+def _complete_graph(*args) -> SizeBound:
+    _ints(*args)
+    r = _span(*args)
+    return SizeBound.exact(len(r), len(r) * (len(r) - 1) // 2, _labels_of(r))
+
+
+def _variadic(args: tuple) -> list[int] | range:
+    """The vertices passed as *args, still a range if they were one `*range`."""
+    if len(args) == 1 and isinstance(args[0], _Splat):
+        return args[0].values
+    values: list[int] = []
+    for a in args:
+        values.extend(_bounded_list(a.values) if isinstance(a, _Splat) else [a])
+    _ints(*values)
+    return values
+
+
+def _fully_connect(*args) -> SizeBound:
+    vertices = _variadic(args)
+    n = _distinct(vertices)
+    return SizeBound.exact(n, n * (n - 1) // 2, _labels_of(vertices))
+
+
+def _connect_one_to_all(center, *args) -> SizeBound:
+    _ints(center)
+    targets = _variadic(args)
+    n = _distinct(targets)
+    # center -> center is a self-loop, so it still counts as an edge
+    vertices = n if center in targets else n + 1
+    labels = _hull((center, center), _labels_of(targets))
+    return SizeBound.exact(vertices, n, labels)
+
+
+def _shift_graph(graph, offset) -> SizeBound:
+    _ints(offset)
+    return _graph(graph).shifted(offset)
+
+
+def _union(bounds: list[SizeBound]) -> SizeBound:
+    if not bounds:
+        return SizeBound.exact(0, 0, None)
+    labelled = sorted((b.labels for b in bounds if b.labels is not None))
+    disjoint = all(a[1] < b[0] for a, b in zip(labelled, labelled[1:]))
+    if disjoint:
+        min_vertices = sum(b.min_vertices for b in bounds)
+        min_edges = sum(b.min_edges for b in bounds)
+    else:
+        min_vertices = max(b.min_vertices for b in bounds)
+        min_edges = max(b.min_edges for b in bounds)
+    return SizeBound(
+        min_vertices,
+        sum(b.max_vertices for b in bounds),
+        min_edges,
+        sum(b.max_edges for b in bounds),
+        _hull(*(b.labels for b in bounds)),
+    ).tightened()
+
+
+def _union_graphs(*graphs) -> SizeBound:
+    return _union([_graph(g) for g in graphs])
+
+
+def _merge_vertices(graph, v1, v2) -> SizeBound:
+    _ints(v1, v2)
+    g = _graph(graph)
+    # v2's edges to v1's neighbours collapse into v1's, at most one per other vertex,
+    # and the self-loops on v1 and v2 and the edge v1-v2 into one self-loop on v1
+    lost = max(g.max_vertices - 2, 0) + 2
+    return SizeBound(
+        max(g.min_vertices - 1, 0),
+        g.max_vertices,
+        max(g.min_edges - lost, 0),
+        g.max_edges,
+        g.labels,
+    )
+
+
+def _remove_vertex(graph, v) -> SizeBound:
+    _ints(v)
+    g = _graph(graph)
+    return SizeBound(
+        max(g.min_vertices - 1, 0),
+        g.max_vertices,
+        max(g.min_edges - g.max_vertices, 0),
+        g.max_edges,
+        g.labels,
+    )
+
+
+def _edge_set(edges) -> set[tuple[int, int]]:
+    if not all(isinstance(e, tuple) and len(e) == 2 for e in edges):
+        raise _Unknown
+    _ints(*(v for e in edges for v in e))
+    return {(min(a, b), max(a, b)) for a, b in edges}
+
+
+def _add_edges(graph, *edges) -> SizeBound:
+    g = _graph(graph)
+    added = _edge_set(edges)
+    endpoints = {v for e in added for v in e}
+    return SizeBound(
+        max(g.min_vertices, len(endpoints)),
+        g.max_vertices + len(endpoints),
+        max(g.min_edges, len(added)),
+        g.max_edges + len(added),
+        _hull(g.labels, _labels_of(endpoints)),
+    ).tightened()
+
+
+def _remove_edges(graph, *edges) -> SizeBound:
+    g = _graph(graph)
+    removed = _edge_set(edges)
+    return SizeBound(
+        g.min_vertices,
+        g.max_vertices,
+        max(g.min_edges - len(removed), 0),
+        g.max_edges,
+        g.labels,
+    )
+
+
+def _numerical_range(*args) -> range:
+    _ints(*args)
+    return _span(*args)
+
+
+def _vertices(*args) -> range:
+    _ints(*args)
+    return range(*args)
+
+
+TRANSFER: dict[str, Callable[..., Any]] = {
+    "path_graph": _path_graph,
+    "cycle_graph": _cycle_graph,
+    "complete_graph": _complete_graph,
+    "fully_connect": _fully_connect,
+    "connect_one_to_all": _connect_one_to_all,
+    "shift_graph": _shift_graph,
+    "union_graphs": _union_graphs,
+    "merge_vertices": _merge_vertices,
+    "remove_vertex": _remove_vertex,
+    "add_edges": _add_edges,
+    "remove_edges": _remove_edges,
+    "numerical_range": _numerical_range,
+    "vertices": _vertices,
+    "range": _vertices,
+}
+
+
+## Evaluating arguments
+
+
+def _check_int(value: int) -> int:
+    if value.bit_length() > _MAX_INT_BITS:
+        raise _Unknown
+    return value
+
+
+_BINARY_OPS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.FloorDiv: lambda a, b: a // b,
+    ast.Mod: lambda a, b: a % b,
+    ast.Pow: lambda a, b: a**b,
+}
+
+
+def _eval(node: ast.AST, env: dict[str, Any]) -> Any:
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return _check_int(node.value)
+    if isinstance(node, ast.Name):
+        if node.id not in env:
+            raise _Unknown
+        return env[node.id]
+    if isinstance(node, ast.Tuple):
+        return tuple(_eval(e, env) for e in node.elts)
+    if isinstance(node, ast.List):
+        return _eval_args(node.elts, env)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _eval(node.operand, env)
+        _ints(value)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        left, right = _eval(node.left, env), _eval(node.right, env)
+        if isinstance(left, int) and isinstance(right, int):
+            if isinstance(node.op, (ast.FloorDiv, ast.Mod)) and right == 0:
+                raise _Unknown
+            # check the size of a power before computing it
+            if isinstance(node.op, ast.Pow) and (
+                right < 0 or left.bit_length() * right > _MAX_INT_BITS
+            ):
+                raise _Unknown
+            return _check_int(_BINARY_OPS[type(node.op)](left, right))
+        if isinstance(node.op, ast.Add) and isinstance(left, (list, range)):
+            if isinstance(right, (list, range)):
+                return _bounded_list(left) + _bounded_list(right)
+        raise _Unknown
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        if node.keywords or node.func.id not in TRANSFER:
+            raise _Unknown
+        return TRANSFER[node.func.id](*_eval_args(node.args, env))
+    raise _Unknown
+
+
+def _bounded_list(values) -> list:
+    if len(values) > MAX_LIST_ITEMS:
+        raise _Unknown
+    return list(values)
+
+
+def _eval_args(nodes: list[ast.AST], env: dict[str, Any]) -> list[Any]:
+    args: list[Any] = []
+    for node in nodes:
+        if isinstance(node, ast.Starred):
+            value = _eval(node.value, env)
+            if isinstance(value, range):
+                args.append(_Splat(value))
+            elif isinstance(value, list):
+                args.extend(value)
+            else:
+                raise _Unknown
+        else:
+            args.append(_eval(node, env))
+    return args
+
+
+def _call_node(app: FunctionApplication) -> ast.Call:
+    name, leaves = app
+    args = [leaf_expression(x) for x in leaves]
+    return ast.Call(ast.Name(name, ast.Load()), args, [])
+
+
+def _apply(app: FunctionApplication, env: dict[str, Any]) -> Any:
+    return _eval(_call_node(app), env)
+
+
+def _union_map(items_app: FunctionApplication, fn: FunctionAbstraction, env) -> Any:
+    items = _apply(items_app, env)
+    if not isinstance(items, (list, range)) or len(items) > MAX_UNROLLED_ITEMS:
+        raise _Unknown
+    param, body = fn
+    call = _call_node(body)
+    scope = dict(env)
+    bounds = []
+    for x in items:
+        scope[param] = x
+        bounds.append(_graph(_eval(call, scope)))
+    return _union(bounds)
+
+
+def _run(term: Term, env: dict[str, Any]) -> Any:
+    if len(term) == 3 and term[0] == "union_map":
+        _, items_app, fn = term
+        return _union_map(items_app, fn, env)
+    return _apply(term, env)
+
+
+def analyze_program(program: Program) -> ProgramAnalysis:
+    """Bounds of every instruction and of the returned graph. Everything is unknown
+    for programs that are not exact (see Program.exact)."""
+    analysis = ProgramAnalysis()
+    if not program.exact:
+        analysis.bounds = [None] * len(program.instructions)
+        return analysis
+
+    env: dict[str, Any] = {}
+    value: Any = None
+    for term, target in zip(program.instructions, program.targets):
+        try:
+            value = _run(term, env)
+        except (
+            _Unknown,
+            ValueError,
+            TypeError,
+            IndexError,
+            SyntaxError,
+            ArithmeticError,
+        ):
+            value = None
+        analysis.bounds.append(value if isinstance(value, SizeBound) else None)
+        if target is not None:
+            if value is None:
+                env.pop(target, None)
+            else:
+                env[target] = value
+    if program.result is not None:
+        value = env.get(program.result)
+    analysis.result = value if isinstance(value, SizeBound) else None
+    return analysis
@@ -0,0 +1,25 @@
+from dsl.dsl import DSL
+from dsl.graph_dsl import GRAPH_DSL
+from dsl.compact_graph import COMPACT_GRAPH_DSL
+from dsl.lazy_graph import LAZY_GRAPH_DSL
+
+# "python" works on tuple graphs, "numpy" on CompactGraphs and "lazy" on symbolic
+# LazyGraphs. All expose the same function names, so a DSL program runs unchanged
+# against any of them.
+GRAPH_DSL_BACKENDS: dict[str, DSL] = {
+    "python": GRAPH_DSL,
+    "numpy": COMPACT_GRAPH_DSL,
+    "lazy": LAZY_GRAPH_DSL,
+}
+
+# Backends that build every edge of every graph a program makes. "lazy" only builds a
+# graph's edges when a comparison needs them, so a K_20000 costs it nothing.
+MATERIALIZING_BACKENDS = frozenset({"python", "numpy"})
+
+
+def get_graph_dsl(backend: str = "python") -> DSL:
+    if backend not in GRAPH_DSL_BACKENDS:
+        raise ValueError(
+            f"Unknown DSL backend {backend!r}, expected one of {sorted(GRAPH_DSL_BACKENDS)}"
+        )
+    return GRAPH_DSL_BACKENDS[backend]
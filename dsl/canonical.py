@@ -0,0 +1,199 @@
+"""Canonical certificates for graphs.
+
+A certificate bundles the invariants compare_graphs looks at (counts, degree sequence,
+WL hash) with a canonical labeling found by colour refinement plus a bounded
+individualization search. When both sides have a canonical labeling, comparing the
+relabeled edge lists decides isomorphism exactly, without running VF2.
+"""
+
+from dataclasses import dataclass
+
+import networkx as nx
+
+from dsl.graph_dsl import Graph
+from dsl.compact_graph import CompactGraph, to_graph
+from dsl.lazy_graph import LazyGraph
+from dsl.utils import (
+    GraphComparison,
+    _compare_lazy_counts,
+    _degree_sequence,
+    _to_nx,
+    _wl_hash,
+)
+
+# Leaves of the individualization-refinement tree we are willing to visit before
+# giving up on a canonical labeling. Symmetric graphs (cycles, cliques) blow past this
+# quickly and fall back to VF2, which handles them in milliseconds.
+MAX_SEARCH_LEAVES = 32
+
+# Past this size we only keep the invariants. The search is pure Python and is run on
+# every generated graph at grading time, so it must stay far cheaper than VF2.
+MAX_CANONICAL_VERTICES = 64
+
+
+@dataclass
+class GraphCertificate:
+    num_vertices: int
+    num_edges: int
+    degree_sequence: list[int]
+    wl_hash: str
+    canonical_edges: list[list[int]] | None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GraphCertificate":
+        return cls(**data)
+
+
+def _refine(adj: list[list[int]], colors: list[int]) -> list[int]:
+    """Colour refinement. Colours are ranks of sorted signatures, so the result only
+    depends on the structure of the graph and the ordering of the input colours."""
+    num_colors = len(set(colors))
+    while True:
+        signatures = [
+            (colors[v], tuple(sorted(colors[u] for u in adj[v])))
+            for v in range(len(adj))
+        ]
+        ranks = {sig: i for i, sig in enumerate(sorted(set(signatures)))}
+        colors = [ranks[sig] for sig in signatures]
+        if len(ranks) == num_colors:
+            return colors
+        num_colors = len(ranks)
+
+
+def _individualize(colors: list[int], v: int) -> list[int]:
+    keys = [(c, 0 if u == v else 1) for u, c in enumerate(colors)]
+    ranks = {key: i for i, key in enumerate(sorted(set(keys)))}
+    return [ranks[key] for key in keys]
+
+
+def _canonical_edges(
+    adj: list[list[int]], edges: list[tuple[int, int]], max_leaves: int
+) -> list[list[int]] | None:
+    best: list[list[int]] | None = None
+    leaves = 0
+
+    def _search(colors: list[int]) -> bool:
+        nonlocal best, leaves
+        cells: dict[int, list[int]] = {}
+        for v, c in enumerate(colors):
+            cells.setdefault(c, []).append(v)
+        targets = [cell for _, cell in sorted(cells.items()) if len(cell) > 1]
+        if not targets:
+            leaves += 1
+            if leaves > max_leaves:
+                return False
+            cert = sorted(sorted([colors[a], colors[b]]) for a, b in edges)
+            if best is None or cert < best:
+                best = cert
+            return True
+        target = min(targets, key=len)
+        for v in target:
+            if not _search(_refine(adj, _individualize(colors, v))):
+                return False
+        return True
+
+    if not _search(_refine(adj, [0] * len(adj))):
+        return None
+    return best
+
+
+def _index(
+    nodes: list, normalized: set[frozenset]
+) -> tuple[list[list[int]], list[tuple[int, int]]]:
+    index_of = {v: i for i, v in enumerate(nodes)}
+    indexed_edges = []
+    adj: list[list[int]] = [[] for _ in nodes]
+    for e in normalized:
+        ends = [index_of[v] for v in e]
+        a, b = ends[0], ends[-1]
+        indexed_edges.append((a, b))
+        adj[a].append(b)
+        if a != b:
+            adj[b].append(a)
+    return adj, indexed_edges
+
+
+def _try_canonical_edges(
+    nodes: list, normalized: set[frozenset], max_leaves: int
+) -> list[list[int]] | None:
+    if len(nodes) > MAX_CANONICAL_VERTICES:
+        return None
+    adj, indexed_edges = _index(nodes, normalized)
+    return _canonical_edges(adj, indexed_edges, max_leaves)
+
+
+def graph_certificate(
+    graph: Graph | CompactGraph, max_leaves: int = MAX_SEARCH_LEAVES
+) -> GraphCertificate:
+    vertices, edges = to_graph(graph)
+    normalized = set(frozenset([a, b]) for a, b in edges)
+    nodes = sorted(set(vertices).union(*normalized))
+
+    return GraphCertificate(
+        num_vertices=len(nodes),
+        num_edges=len(normalized),
+        degree_sequence=_degree_sequence(set(nodes), normalized),
+        wl_hash=_wl_hash(_to_nx(vertices, edges)),
+        canonical_edges=_try_canonical_edges(nodes, normalized, max_leaves),
+    )
+
+
+def compare_with_certificate(
+    graph: Graph | CompactGraph | LazyGraph,
+    expected_graph: Graph,
+    expected_certificate: GraphCertificate,
+) -> GraphComparison:
+    """Like compare_graphs(graph, expected_graph), but checks the invariants against
+    the precomputed certificate of the expected graph.
+
+    The generated graph's canonical labeling is only searched for when the graph is
+    small and the expected graph has one; everything else goes straight to VF2. A
+    LazyGraph has its counts checked before any of its edges are built.
+    """
+    if isinstance(graph, LazyGraph):
+        mismatch = _compare_lazy_counts(
+            graph,
+            expected_certificate.num_vertices,
+            expected_certificate.num_edges,
+            lambda: expected_certificate.degree_sequence,
+        )
+        if mismatch is not None:
+            return mismatch
+
+    vertices, edges = to_graph(graph)
+    normalized = set(frozenset([a, b]) for a, b in edges)
+    expected_vertices, expected_edges = expected_graph
+    if set(vertices) == set(expected_vertices) and normalized == set(
+        frozenset([a, b]) for a, b in expected_edges
+    ):
+        return GraphComparison(True, "labeled")
+
+    nodes = set(vertices).union(*normalized)
+    if len(nodes) != expected_certificate.num_vertices:
+        return GraphComparison(False, "vertex_count")
+    if len(normalized) != expected_certificate.num_edges:
+        return GraphComparison(False, "edge_count")
+    if _degree_sequence(nodes, normalized) != expected_certificate.degree_sequence:
+        return GraphComparison(False, "degree_sequence")
+
+    nx_graph = _to_nx(vertices, edges)
+    if _wl_hash(nx_graph) != expected_certificate.wl_hash:
+        return GraphComparison(False, "wl_hash")
+    if expected_certificate.canonical_edges is not None:
+        canonical_edges = _try_canonical_edges(
+            sorted(nodes), normalized, MAX_SEARCH_LEAVES
+        )
+        if canonical_edges is not None:
+            return GraphComparison(
+                canonical_edges == expected_certificate.canonical_edges,
+                "certificate",
+            )
+    return GraphComparison(
+        nx.is_isomorphic(nx_graph, _to_nx(expected_vertices, expected_edges)),
+        "isomorphism",
+    )
+
+
+def certificate_cache_key(name: str, matrix_digest: str) -> str:
+    """WL hashes changed across networkx releases, so they are part of the key."""
+    return f"{name}:{matrix_digest}:nx{nx.__version__}"
@@ -0,0 +1,259 @@
+"""Array-backed graphs for the DSL.
+
+A CompactGraph stores its vertices as a sorted int64 array and its edges as an E x 2
+int64 array of (min, max) pairs with no duplicates, instead of lists of boxed Python
+tuples. Every function in GRAPH_DSL has a counterpart here with the same name and
+signature that accepts and returns CompactGraphs, collected in COMPACT_GRAPH_DSL.
+
+Edge sets are deduplicated and compared by packing each (min, max) pair into a single
+int64 key, so unions and removals are one np.unique / np.isin over flat arrays.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from dsl.dsl import DSL
+from dsl.graph_dsl import Number, Vertex, Edge, EdgeList, VertexList, Graph
+
+
+@dataclass(frozen=True, eq=False)
+class CompactGraph:
+    vertices: np.ndarray
+    edges: np.ndarray
+
+    @classmethod
+    def from_graph(cls, graph: "Graph | CompactGraph") -> "CompactGraph":
+        if isinstance(graph, CompactGraph):
+            return graph
+        if hasattr(graph, "to_compact"):  # e.g. a dsl.lazy_graph.LazyGraph
+            return graph.to_compact()
+        vertices, edges = graph
+        return _make(vertices, edges)
+
+    def to_graph(self) -> Graph:
+        edges = [(a, b) for a, b in self.edges.tolist()]
+        return (self.vertices.tolist(), edges)
+
+    def __iter__(self):
+        """`vertices, edges = g` unpacks to lists, as it does for a tuple Graph."""
+        return iter(self.to_graph())
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edges)
+
+
+def to_compact(graph: Graph | CompactGraph) -> CompactGraph:
+    return CompactGraph.from_graph(graph)
+
+
+def to_graph(graph: Graph | CompactGraph) -> Graph:
+    if hasattr(graph, "to_graph"):  # CompactGraph, or a dsl.lazy_graph.LazyGraph
+        return graph.to_graph()
+    return graph
+
+
+# Largest vertex span for which (a - lo) * span + (b - lo) still fits in an int64.
+_MAX_PACKED_SPAN = 3_037_000_499
+
+
+def _vertex_array(vertices) -> np.ndarray:
+    return np.unique(np.asarray(vertices, dtype=np.int64).ravel())
+
+
+def _edge_array(edges) -> np.ndarray:
+    arr = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    return np.sort(arr, axis=1)
+
+
+def _key_space(*arrays: np.ndarray) -> tuple[int, int] | None:
+    """Offset and span used to pack normalized edges into one int64 key each."""
+    non_empty = [a for a in arrays if a.size]
+    if not non_empty:
+        return (0, 1)
+    lo = min(int(a.min()) for a in non_empty)
+    hi = max(int(a.max()) for a in non_empty)
+    span = hi - lo + 1
+    if span > _MAX_PACKED_SPAN:
+        return None
+    return (lo, span)
+
+
+def _pack(edges: np.ndarray, lo: int, span: int) -> np.ndarray:
+    return (edges[:, 0] - lo) * span + (edges[:, 1] - lo)
+
+
+def _unique_edges(edges: np.ndarray) -> np.ndarray:
+    key_space = _key_space(edges)
+    if key_space is None:
+        return np.unique(edges, axis=0)
+    lo, span = key_space
+    keys = np.unique(_pack(edges, lo, span))
+    return np.column_stack([keys // span + lo, keys % span + lo])
+
+
+def _make(vertices, edges) -> CompactGraph:
+    return CompactGraph(
+        vertices=_vertex_array(vertices),
+        edges=_unique_edges(_edge_array(edges)),
+    )
+
+
+def _range_array(start: int, end: int | None, step: int) -> np.ndarray:
+    if end is None:
+        end = start
+        start = 0
+    return np.arange(start, end, step, dtype=np.int64)
+
+
+# DSL Functions
+
+## Create a graph from nothing
+
+
+def path_graph(start: int, end: int | None = None, step: int = 1) -> CompactGraph:
+    vs = _range_array(start, end, step)
+    edges = np.column_stack([vs[:-1], vs[1:]]) if len(vs) >= 2 else []
+    return _make(vs, edges)
+
+
+def complete_graph(start: int, end: int | None = None, step: int = 1) -> CompactGraph:
+    vs = _range_array(start, end, step)
+    i, j = np.triu_indices(len(vs), k=1)
+    return _make(vs, np.column_stack([vs[i], vs[j]]))
+
+
+def cycle_graph(start: int, end: int | None = None, step: int = 1) -> CompactGraph:
+    vs = _range_array(start, end, step)
+    if len(vs) < 3:
+        return _make(vs, [])
+    return _make(vs, np.column_stack([vs, np.roll(vs, -1)]))
+
+
+## Modify existing graphs
+
+
+def shift_graph(graph: CompactGraph, offset: int) -> CompactGraph:
+    """Shift all vertex indices in the graph by offset."""
+    g = to_compact(graph)
+    return CompactGraph(vertices=g.vertices + offset, edges=g.edges + offset)
+
+
+def union_graphs(*gg: CompactGraph) -> CompactGraph:
+    """Union of a bunch of graphs."""
+    parts = [to_compact(g) for g in gg]
+    if not parts:
+        return _make([], [])
+    return _make(
+        np.concatenate([g.vertices for g in parts]),
+        np.concatenate([g.edges for g in parts]),
+    )
+
+
+# Create graph from vertices
+
+
+def connect_one_to_all(center: Vertex, *targets: Vertex) -> CompactGraph:
+    """Create a star graph with center connected to all targets."""
+    ts = np.asarray(targets, dtype=np.int64)
+    edges = np.column_stack([np.full(len(ts), center, dtype=np.int64), ts])
+    return _make([center, *targets], edges)
+
+
+def fully_connect(*vertices: Vertex) -> CompactGraph:
+    """Create a fully connected graph with the given vertices."""
+    vs = np.unique(np.asarray(vertices, dtype=np.int64))
+    i, j = np.triu_indices(len(vs), k=1)
+    return _make(vs, np.column_stack([vs[i], vs[j]]))
+
+
+def merge_vertices(graph: CompactGraph, v1: Vertex, v2: Vertex) -> CompactGraph:
+    """Merge vertices v1 and v2 into a single vertex in graph. v1 is kept. All the old edges of v2 belong to v1."""
+    g = to_compact(graph)
+    present = np.isin([v1, v2], g.vertices)
+    if not present.all() or v1 == v2:
+        return g
+    edges = np.where(g.edges == v2, v1, g.edges)
+    return _make(g.vertices[g.vertices != v2], edges)
+
+
+def remove_vertex(graph: CompactGraph, v: Vertex) -> CompactGraph:
+    """Remove vertex v from graph."""
+    g = to_compact(graph)
+    keep = (g.edges != v).all(axis=1)
+    return CompactGraph(vertices=g.vertices[g.vertices != v], edges=g.edges[keep])
+
+
+def add_edges(graph: CompactGraph, *edges: Edge) -> CompactGraph:
+    """If any vercies are missing, we add them as well"""
+    g = to_compact(graph)
+    new_edges = _edge_array(edges)
+    return _make(
+        np.concatenate([g.vertices, new_edges.ravel()]),
+        np.concatenate([g.edges, new_edges]),
+    )
+
+
+def remove_edges(graph: CompactGraph, *edges: Edge) -> CompactGraph:
+    """Remove edges from a graph."""
+    g = to_compact(graph)
+    to_remove = _edge_array(edges)
+    key_space = _key_space(g.edges, to_remove)
+    if key_space is None:
+        removed = {tuple(e) for e in to_remove.tolist()}
+        keep = np.asarray(
+            [tuple(e) not in removed for e in g.edges.tolist()], dtype=bool
+        )
+    else:
+        lo, span = key_space
+        keep = np.isin(
+            _pack(g.edges, lo, span), _pack(to_remove, lo, span), invert=True
+        )
+    return CompactGraph(vertices=g.vertices, edges=g.edges[keep])
+
+
+# Plain lists, like the python backend, so `+`, `*` and unpacking keep their list
+# meaning inside DSL programs.
+def vertices(*args, **kwargs) -> list[Vertex]:
+    return list(range(*args, **kwargs))
+
+
+def numerical_range(start: int, end: int | None = None, step: int = 1) -> list[Number]:
+    return _range_array(start, end, step).tolist()
+
+
+def union_map(items, fn) -> CompactGraph:
+    return union_graphs(*(fn(x) for x in items))
+
+
+COMPACT_GRAPH_DSL = DSL(
+    functions=[
+        path_graph,
+        shift_graph,
+        connect_one_to_all,
+        union_graphs,
+        union_map,
+        fully_connect,
+        merge_vertices,
+        remove_vertex,
+        complete_graph,
+        cycle_graph,
+        add_edges,
+        remove_edges,
+        vertices,
+        numerical_range,
+    ],
+    types=[
+        Number,
+        Vertex,
+        Edge,
+        EdgeList,
+        VertexList,
+        CompactGraph,
+    ],
+)
@@ -1,7 +1,11 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Callable, Any
 import ast
+import builtins
+import hashlib
 import inspect
+import operator
 
 
 def get_only(items: list[Any]) -> Any:
@@ -31,16 +35,143 @@ Term = (
 @dataclass
 class Program:
     instructions: list[Term]
-    original_function: Callable
+    original_function: Callable | None
+    # Name each instruction is assigned to, None for bare calls and returns.
+    targets: list[str | None] = field(default_factory=list)
+    # Name the function returns, None if it returns its last instruction.
+    result: str | None = None
+    # Whether running the instructions does everything calling the function does, see
+    # _is_exact. Only exact programs can be analyzed or run by run_program.
+    exact: bool = False
+
+
+# Builtins run_program can call. Programs using any other builtin are not exact.
+INTERPRETED_BUILTINS: dict[str, Callable] = {
+    "range": range,
+    "len": len,
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "list": list,
+    "tuple": tuple,
+}
+
+# Everything an argument may contain in an exact program.
+_ARGUMENT_NODES = (
+    ast.Constant,
+    ast.Name,
+    ast.Load,
+    ast.Tuple,
+    ast.List,
+    ast.Starred,
+    ast.Call,
+    ast.UnaryOp,
+    ast.UAdd,
+    ast.USub,
+    ast.BinOp,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+)
 
 
 def parse_program(program: Callable) -> Program:
-    def _get_source_tree(fn: Callable) -> ast.FunctionDef:
-        src = inspect.getsource(fn)
-        module = ast.parse(src)
-        fndefs = [n for n in module.body if isinstance(n, ast.FunctionDef)]
-        return get_only(fndefs)
+    src = inspect.getsource(program)
+    module = ast.parse(src)
+    fndefs = [n for n in module.body if isinstance(n, ast.FunctionDef)]
+    return _parse_function_def(get_only(fndefs), program)
+
+
+def parse_program_source(source: str, name: str = "compress") -> Program:
+    """The program of the function called name in source, without running any of it.
+    Raises KeyError if source does not define that function. The program is only exact
+    if source holds nothing but that function, since anything else at module level can
+    change what the function does."""
+    module = ast.parse(source)
+    fndefs = [
+        n for n in module.body if isinstance(n, ast.FunctionDef) and n.name == name
+    ]
+    if not fndefs:
+        raise KeyError(name)
+    fn = fndefs[-1]
+    program = _parse_function_def(fn, None)
+    program.exact = program.exact and all(
+        n is fn or _is_docstring(n) for n in module.body
+    )
+    return program
+
+
+def program_fingerprint(source: str, name: str = "compress") -> str:
+    """Hash of source that ignores formatting, comments, docstrings and the names of
+    the local variables of the function called name, which are renamed in order of
+    appearance. Sources with the same fingerprint behave the same. Source that does
+    not parse is hashed as it is."""
+    try:
+        module = ast.parse(source)
+    except SyntaxError:
+        return hashlib.sha256(source.encode()).hexdigest()
+    module.body = [stmt for stmt in module.body if not _is_docstring(stmt)]
+    for fn in module.body:
+        if isinstance(fn, ast.FunctionDef) and fn.name == name:
+            fn.body = [stmt for stmt in fn.body if not _is_docstring(stmt)]
+            _rename_locals(fn)
+    dump = ast.dump(module, annotate_fields=False)
+    return hashlib.sha256(dump.encode()).hexdigest()
+
+
+# Nodes that bind or look up local names in ways _rename_locals can't follow.
+_NAME_BINDERS = (
+    ast.Global,
+    ast.Nonlocal,
+    ast.ExceptHandler,
+    ast.Import,
+    ast.ImportFrom,
+    ast.FunctionDef,
+    ast.AsyncFunctionDef,
+    ast.ClassDef,
+    ast.match_case,
+)
+_REFLECTION = {"locals", "globals", "vars", "dir", "eval", "exec"}
+
+
+def _rename_locals(fn: ast.FunctionDef) -> None:
+    """Renames the assigned names and the parameters in fn (lambdas included) to $0,
+    $1, ..., which no source can contain. Functions that bind names some other way
+    are left alone."""
+    nodes = list(ast.walk(fn))[1:]
+    if any(isinstance(n, _NAME_BINDERS) for n in nodes) or any(
+        isinstance(n, ast.Name) and n.id in _REFLECTION for n in nodes
+    ):
+        return
+    local = {
+        n.id
+        for n in nodes
+        if isinstance(n, ast.Name) and isinstance(n.ctx, (ast.Store, ast.Del))
+    }
+    local |= {n.arg for n in nodes if isinstance(n, ast.arg)}
+    renamed: dict[str, str] = {}
+    for n in nodes:
+        if isinstance(n, ast.Name) and n.id in local:
+            n.id = renamed.setdefault(n.id, f"${len(renamed)}")
+        elif isinstance(n, ast.arg):
+            n.arg = renamed.setdefault(n.arg, f"${len(renamed)}")
 
+
+def _is_docstring(stmt: ast.stmt) -> bool:
+    return (
+        isinstance(stmt, ast.Expr)
+        and isinstance(stmt.value, ast.Constant)
+        and isinstance(stmt.value.value, str)
+    )
+
+
+def _parse_function_def(
+    fn: ast.FunctionDef, original_function: Callable | None
+) -> Program:
     def _leaf(node: ast.AST) -> LeafTerm:
         if isinstance(node, ast.Constant) and isinstance(node.value, int):
             return int(node.value)
@@ -80,8 +211,14 @@ def parse_program(program: Callable) -> Program:
         fn_abs = _lambda(value.args[1])
         return ("union_map", items, fn_abs)
 
-    fn = _get_source_tree(program)
+    def _target(stmt: ast.Assign) -> str | None:
+        if len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+            return stmt.targets[0].id
+        return None
+
     instructions: list[Term] = []
+    targets: list[str | None] = []
+    result: str | None = None
 
     for stmt in fn.body:
         if isinstance(stmt, ast.Assign):
@@ -92,6 +229,7 @@ def parse_program(program: Callable) -> Program:
                     instructions.append(_parse_union_map_call(value))
                 else:
                     instructions.append(_fun_app(value))
+                targets.append(_target(stmt))
             continue
 
         if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
@@ -101,6 +239,7 @@ def parse_program(program: Callable) -> Program:
                 instructions.append(_parse_union_map_call(value))
             else:
                 instructions.append(_fun_app(value))
+            targets.append(None)
             continue
 
         if isinstance(stmt, ast.Return):
@@ -111,20 +250,106 @@ def parse_program(program: Callable) -> Program:
                     instructions.append(_parse_union_map_call(value))
                 else:
                     instructions.append(_fun_app(value))
+                targets.append(None)
+            elif isinstance(value, ast.Name):
+                result = value.id
             continue
 
-        if (
-            isinstance(stmt, ast.Expr)
-            and isinstance(stmt.value, ast.Constant)
-            and isinstance(stmt.value.value, str)
-        ):
+        if _is_docstring(stmt):
             continue
 
         raise ValueError(
             f"Unsupported statement in DSL program: {ast.dump(stmt, include_attributes=False)}"
         )
 
-    return Program(instructions=instructions, original_function=program)
+    return Program(
+        instructions=instructions,
+        original_function=original_function,
+        targets=targets,
+        result=result,
+        exact=_is_exact(fn),
+    )
+
+
+def _is_exact(fn: ast.FunctionDef) -> bool:
+    """The parser drops keyword arguments and extra union_map arguments, and skips
+    assignments of anything but a call, as well as returns of anything but a call or a
+    name. A function is exact if it has none of those, takes no parameters, has no
+    decorators, ends in its only return, and its arguments are built from constants,
+    names and arithmetic only (see _ARGUMENT_NODES)."""
+    if fn.decorator_list or any(
+        [fn.args.posonlyargs, fn.args.args, fn.args.vararg, fn.args.kwonlyargs]
+        + [fn.args.kwarg]
+    ):
+        return False
+    body = [stmt for stmt in fn.body if not _is_docstring(stmt)]
+    if not body or not isinstance(body[-1], ast.Return):
+        return False
+    lambdas = set()
+    for stmt in body:
+        if isinstance(stmt, ast.Assign) and not (
+            len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name)
+        ):
+            return False
+        if isinstance(stmt, ast.Return) and stmt is not body[-1]:
+            return False
+        value = stmt.value
+        returned = isinstance(stmt, ast.Return)
+        if not isinstance(value, (ast.Call, ast.Name) if returned else ast.Call):
+            return False
+        if isinstance(value, ast.Call) and _is_union_map(value):
+            lam = value.args[1]
+            if len(value.args) != 2 or not _is_plain_lambda(lam):
+                return False
+            lambdas.add(lam)
+        for node in ast.walk(value):
+            if node in lambdas:
+                continue
+            if isinstance(node, (ast.arguments, ast.arg)):
+                continue
+            if not isinstance(node, _ARGUMENT_NODES):
+                return False
+            if isinstance(node, ast.Call) and (
+                node.keywords or not isinstance(node.func, ast.Name)
+            ):
+                return False
+            if (
+                isinstance(node, ast.Name)
+                and hasattr(builtins, node.id)
+                and node.id not in INTERPRETED_BUILTINS
+            ):
+                return False
+    return True
+
+
+def _is_union_map(call: ast.Call) -> bool:
+    return isinstance(call.func, ast.Name) and call.func.id == "union_map"
+
+
+def _is_plain_lambda(node: ast.AST) -> bool:
+    """A lambda of exactly one positional parameter, without a default."""
+    if not isinstance(node, ast.Lambda):
+        return False
+    args = node.args
+    return (
+        len(args.args) == 1
+        and not args.posonlyargs
+        and not args.vararg
+        and not args.kwonlyargs
+        and not args.kwarg
+        and not args.defaults
+    )
+
+
+@lru_cache(maxsize=4096)
+def leaf_expression(leaf: LeafTerm) -> ast.expr:
+    """Expression of a leaf. The parser keeps ints and names as they are and anything
+    else, starred arguments included, as source."""
+    if isinstance(leaf, int):
+        return ast.Constant(leaf)
+    if leaf.startswith("*"):
+        return ast.Starred(ast.parse(leaf[1:], mode="eval").body, ast.Load())
+    return ast.parse(leaf, mode="eval").body
 
 
 def get_program_cost(program: Program) -> int:
@@ -147,3 +372,97 @@ def get_program_cost(program: Program) -> int:
         raise ValueError(f"Unsupported term: {term}")
 
     return sum(cost_term(t) for t in program.instructions)
+
+
+_OPERATORS: dict[type, Callable] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+Lookup = Callable[[str, dict[str, Any]], Any]
+
+
+def run_program(program: Program, dsl: DSL) -> Any:
+    """Runs an exact program against the functions of dsl and returns what calling the
+    function would, without compiling or executing any Python."""
+    if not program.exact:
+        raise ValueError("Only exact programs can be run, call the function instead")
+    functions = {fn.__name__: fn for fn in dsl.functions}
+    local_names = {t for t in program.targets if t is not None}
+
+    def lookup(name: str, scope: dict[str, Any]) -> Any:
+        if name in scope:
+            return scope[name]
+        if name in local_names:
+            raise UnboundLocalError(
+                f"cannot access local variable '{name}' where it is not associated "
+                "with a value"
+            )
+        if name in functions:
+            return functions[name]
+        if name in INTERPRETED_BUILTINS:
+            return INTERPRETED_BUILTINS[name]
+        raise NameError(f"name '{name}' is not defined")
+
+    env: dict[str, Any] = {}
+    value: Any = None
+    for term, target in zip(program.instructions, program.targets):
+        value = _run_term(term, env, lookup)
+        if target is not None:
+            env[target] = value
+    if program.result is not None:
+        return lookup(program.result, env)
+    return value
+
+
+def _run_term(term: Term, scope: dict[str, Any], lookup: Lookup) -> Any:
+    if len(term) == 3 and term[0] == "union_map":
+        _, items_app, (param, body) = term
+        union_map = lookup("union_map", scope)
+        items = _apply(items_app, scope, lookup)
+        return union_map(items, lambda x: _apply(body, {**scope, param: x}, lookup))
+    return _apply(term, scope, lookup)
+
+
+def _apply(app: FunctionApplication, scope: dict[str, Any], lookup: Lookup) -> Any:
+    name, leaves = app
+    fn = lookup(name, scope)
+    return fn(*_evaluate_all([leaf_expression(x) for x in leaves], scope, lookup))
+
+
+def _evaluate_all(nodes: list[ast.expr], scope: dict[str, Any], lookup: Lookup) -> list:
+    values: list[Any] = []
+    for node in nodes:
+        if isinstance(node, ast.Starred):
+            values.extend(_evaluate(node.value, scope, lookup))
+        else:
+            values.append(_evaluate(node, scope, lookup))
+    return values
+
+
+def _evaluate(node: ast.expr, scope: dict[str, Any], lookup: Lookup) -> Any:
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        return lookup(node.id, scope)
+    if isinstance(node, ast.Tuple):
+        return tuple(_evaluate_all(node.elts, scope, lookup))
+    if isinstance(node, ast.List):
+        return _evaluate_all(node.elts, scope, lookup)
+    if isinstance(node, ast.UnaryOp):
+        return _OPERATORS[type(node.op)](_evaluate(node.operand, scope, lookup))
+    if isinstance(node, ast.BinOp):
+        left = _evaluate(node.left, scope, lookup)
+        right = _evaluate(node.right, scope, lookup)
+        return _OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        fn = lookup(node.func.id, scope)
+        return fn(*_evaluate_all(node.args, scope, lookup))
+    raise ValueError(f"Unsupported expression in DSL program: {ast.unparse(node)}")
@@ -0,0 +1,142 @@
+"""Parametric versions of the sample families, for scaling studies.
+
+parse_program reads a builder's source, so a builder has to spell out its sizes as
+literals (see the note in dsl/samples.py). Each family is therefore a source template.
+family_builder renders it for one size, compiles it under a made-up filename and
+registers the source in linecache, so inspect.getsource and parse_program see an
+ordinary fully instantiated builder.
+
+Sizes are approximate vertex counts; every family rounds to the nearest size it can
+build. Dense families (crowns contain a clique) have a lower max_size.
+"""
+
+from dataclasses import dataclass
+from functools import cache
+from typing import Callable
+import linecache
+
+from dsl.graph_dsl import GRAPH_DSL, Graph
+
+
+@dataclass(frozen=True)
+class Family:
+    template: str
+    params: Callable[[int], dict[str, int]]
+    max_size: int = 100_000
+
+
+FAMILIES: dict[str, Family] = {
+    "wheel": Family(
+        template="""\
+def wheel_{size}() -> Graph:
+    c = cycle_graph({m})
+    s = connect_one_to_all({m}, *numerical_range({m}))
+    return union_graphs(c, s)
+""",
+        params=lambda size: {"m": max(3, size - 1)},
+    ),
+    "prism": Family(
+        template="""\
+def prism_{size}() -> Graph:
+    c1 = cycle_graph({m})
+    c2 = shift_graph(c1, {m})
+    rungs = union_map(numerical_range({m}), lambda i: connect_one_to_all(i, i + {m}))
+    return union_graphs(c1, c2, rungs)
+""",
+        params=lambda size: {"m": max(3, size // 2)},
+    ),
+    "generalized_petersen": Family(
+        template="""\
+def generalized_petersen_{size}() -> Graph:
+    outer = cycle_graph({m})
+    inner = union_map(
+        numerical_range({m}), lambda i: connect_one_to_all({m} + i, (i + 2) % {m} + {m})
+    )
+    spokes = union_map(numerical_range({m}), lambda i: connect_one_to_all(i, i + {m}))
+    return union_graphs(outer, inner, spokes)
+""",
+        params=lambda size: {"m": max(5, size // 2)},
+    ),
+    "crown": Family(
+        template="""\
+def crown_{size}() -> Graph:
+    g1 = complete_graph(0, {n})
+    g2 = remove_edges(g1, {matching})
+    return g2
+""",
+        params=lambda size: {"n": 2 * max(3, size // 2)},
+        max_size=2_000,
+    ),
+    "ladder": Family(
+        template="""\
+def ladder_{size}() -> Graph:
+    left = path_graph(0, {m})
+    right = path_graph({m}, {n})
+    single_rung = path_graph(0, {n}, {m})
+    rungs = union_map(numerical_range(1, {last}), lambda k: shift_graph(single_rung, k))
+    return union_graphs(left, right, rungs)
+""",
+        params=lambda size: {
+            "m": max(3, size // 2),
+            "n": 2 * max(3, size // 2),
+            "last": max(3, size // 2) - 1,
+        },
+    ),
+    "clique_chain": Family(
+        template="""\
+def clique_chain_{size}() -> Graph:
+    base = complete_graph(0, 5)
+    return union_map(numerical_range({count}), lambda i: shift_graph(base, i * 4))
+""",
+        params=lambda size: {"count": max(1, (size - 1) // 4)},
+    ),
+}
+
+SCALING_SIZES = (10, 100, 1_000, 10_000, 100_000)
+
+
+def render_family(family: str, size: int) -> str:
+    spec = FAMILIES[family]
+    params = spec.params(size)
+    if family == "crown":
+        half = params["n"] // 2
+        params["matching"] = ", ".join(f"({i}, {i + half})" for i in range(half))
+    return spec.template.format(size=size, **params)
+
+
+@cache
+def family_builder(family: str, size: int) -> Callable[[], Graph]:
+    source = render_family(family, size)
+    filename = f"<family:{family}_{size}>"
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    env: dict[str, object] = {fn.__name__: fn for fn in GRAPH_DSL.functions}
+    env["Graph"] = Graph
+    exec(compile(source, filename, "exec"), env)
+    return env[f"{family}_{size}"]
+
+
+@dataclass(frozen=True)
+class FamilyInstance:
+    """One family at one size. Unlike the builder function it stands for, it can be
+    sent to worker processes."""
+
+    family: str
+    size: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.family}_{self.size}"
+
+    def builder(self) -> Callable[[], Graph]:
+        return family_builder(self.family, self.size)
+
+
+def family_instances(
+    sizes: tuple[int, ...] = SCALING_SIZES, max_size: int | None = None
+) -> list[FamilyInstance]:
+    return [
+        FamilyInstance(family, size)
+        for family, spec in FAMILIES.items()
+        for size in sizes
+        if size <= spec.max_size and (max_size is None or size <= max_size)
+    ]
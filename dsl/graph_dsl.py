@@ -61,7 +61,7 @@ def shift_graph(graph: Graph, offset: int) -> Graph:
 
 
 def union_graphs(*gg: Graph) -> Graph:
-    """Union of a bunch of graphs."""
+    """Union of a bunch of graphs. Edges come out as (min, max) pairs."""
     vertices = []
     edges = []
     for g in gg:
@@ -69,7 +69,7 @@ def union_graphs(*gg: Graph) -> Graph:
         vertices.extend(v)
         edges.extend(e)
     vertices = sorted(list(set(vertices)))
-    edges = sorted(list(set(edges)))
+    edges = sorted(list(set((min(a, b), max(a, b)) for a, b in edges)))
     return (vertices, edges)
 
 
@@ -90,28 +90,31 @@ def fully_connect(*vertices: Vertex) -> Graph:
 
 
 def merge_vertices(graph: Graph, v1: Vertex, v2: Vertex) -> Graph:
-    """Merge vertices v1 and v2 into a single vertex in graph. v1 is kept. All the old edges of v2 belong to v1."""
+    """Merge vertices v1 and v2 into a single vertex in graph. v1 is kept. All the old edges of v2 belong to v1.
+
+    One pass over the vertices and one over the edges, with set lookups instead of
+    list scans. The result is a fresh pair of lists, so every call costs the size of
+    the graph. The "numpy" backend makes the same pass vectorized.
+    """
     vertices, edges = graph
-    if v1 not in vertices or v2 not in vertices or v1 == v2:
+    members = set(vertices)
+    if v1 not in members or v2 not in members or v1 == v2:
         return graph
 
     new_vertices = [v for v in vertices if v != v2]
-
-    new_edges = []
+    # dict keeps the first occurrence of every edge, so the order is deterministic
+    new_edges: dict[Edge, None] = {}
     for a, b in edges:
         if a == v2:
             a = v1
         if b == v2:
             b = v1
-        new_edges.append((min(a, b), max(a, b)))
-
-    new_edges = list(set(new_edges))
-
-    return (new_vertices, new_edges)
+        new_edges[(min(a, b), max(a, b))] = None
+    return (new_vertices, list(new_edges))
 
 
 def remove_vertex(graph: Graph, v: Vertex) -> Graph:
-    """Remove vertex v from graph."""
+    """Remove vertex v from graph. One pass over each list, keeping their order."""
     vertices, edges = graph
     new_edges = [(a, b) for a, b in edges if a != v and b != v]
     new_vertices = [a for a in vertices if a != v]
@@ -121,7 +124,8 @@ def remove_vertex(graph: Graph, v: Vertex) -> Graph:
 def add_edges(graph: Graph, *edges: Edge) -> Graph:
     """If any vercies are missing, we add them as well"""
     vertices, existing_edges = graph
-    new_edges = list(set(existing_edges) | set(edges))
+    # (a, b) and (b, a) are the same edge; keeping both would count it twice.
+    new_edges = list(set((min(a, b), max(a, b)) for a, b in [*existing_edges, *edges]))
     new_vertices = list(set(vertices) | set(v for e in new_edges for v in e))
     return (new_vertices, new_edges)
 
@@ -146,10 +150,19 @@ def numerical_range(start: int, end: int | None = None, step: int = 1) -> list[N
 
 
 def union_map(items, fn) -> Graph:
-    acc: Graph = ([], [])
+    """Union of fn(x) for every x in items.
+
+    Collects everything into sets and sorts once at the end, which gives the same
+    result as folding with union_graphs without re-sorting the accumulator per item.
+    Like union_graphs, edges come out as (min, max) pairs.
+    """
+    all_vertices: set[Vertex] = set()
+    all_edges: set[Edge] = set()
     for x in items:
-        acc = union_graphs(acc, fn(x))
-    return acc
+        v, e = fn(x)
+        all_vertices.update(v)
+        all_edges.update((min(a, b), max(a, b)) for a, b in e)
+    return (sorted(all_vertices), sorted(all_edges))
 
 
 GRAPH_DSL = DSL(
@@ -0,0 +1,161 @@
+"""Memoization of DSL calls.
+
+memoized_dsl wraps every function of a DSL so that a call with the same arguments as
+an earlier one returns the earlier result. The results are hash-consed: every object
+the cache hands out gets a serial number, and a later call that takes that object is
+keyed by the number instead of by its contents, so keying shift_graph(g, 10) costs
+the same for any size of g. Other tuples and lists (edges, graphs built elsewhere) are
+keyed by content. Calls with an argument that cannot be keyed, like union_map's
+lambda, are passed through uncached, and so are calls that raise.
+
+Callers share results, so only memoize code that cannot mutate what it gets back,
+like run_program's. Code that is exec'd could append to a cached edge list.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Hashable
+
+from dsl.dsl import DSL
+
+DEFAULT_MAXSIZE = 4096
+# Bound on the vertices and edges of all cached results together, so that a cache
+# kept across responses stays far below the sandbox's memory limit.
+DEFAULT_MAX_WEIGHT = 1_000_000
+
+_SCALARS = (int, float, str, bool, type(None))
+
+
+@dataclass
+class MemoStats:
+    hits: int = 0
+    misses: int = 0
+    uncached: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def __sub__(self, other: "MemoStats") -> "MemoStats":
+        return MemoStats(
+            self.hits - other.hits,
+            self.misses - other.misses,
+            self.uncached - other.uncached,
+        )
+
+
+class _Unkeyable(Exception):
+    pass
+
+
+class MemoCache:
+    """LRU of DSL call results, keyed by function and arguments. It keeps at most
+    maxsize results, of at most max_weight vertices and edges together."""
+
+    def __init__(
+        self, maxsize: int = DEFAULT_MAXSIZE, max_weight: int = DEFAULT_MAX_WEIGHT
+    ):
+        self.maxsize = maxsize
+        self.max_weight = max_weight
+        self.weight = 0
+        self.stats = MemoStats()
+        # key -> (result, weight)
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        # id(result) -> [serial, result, number of entries holding result]
+        self._serials: dict[int, list] = {}
+        self._next_serial = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._serials.clear()
+        self.weight = 0
+
+    def call(self, fn: Callable, args: tuple) -> Any:
+        try:
+            key = (fn, self._key(args))
+        except _Unkeyable:
+            self.stats.uncached += 1
+            return fn(*args)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+        self.stats.misses += 1
+        result = fn(*args)
+        self._store(key, result)
+        return result
+
+    def _key(self, value: Any) -> Hashable:
+        if type(value) in _SCALARS:
+            return (type(value), value)
+        known = self._serials.get(id(value))
+        if known is not None and known[1] is value:
+            return ("result", known[0])
+        if isinstance(value, (tuple, list)):
+            kind = tuple if isinstance(value, tuple) else list
+            return (kind, tuple(self._key(v) for v in value))
+        if type(value) is range:
+            return value
+        raise _Unkeyable
+
+    def _store(self, key: Hashable, result: Any) -> None:
+        weight = _weight(result)
+        if weight > self.max_weight:
+            return
+        self._entries[key] = (result, weight)
+        self.weight += weight
+        known = self._serials.get(id(result))
+        if known is not None and known[1] is result:
+            known[2] += 1
+        else:
+            self._serials[id(result)] = [self._next_serial, result, 1]
+            self._next_serial += 1
+        while len(self._entries) > self.maxsize or self.weight > self.max_weight:
+            _, (evicted, evicted_weight) = self._entries.popitem(last=False)
+            self.weight -= evicted_weight
+            known = self._serials[id(evicted)]
+            known[2] -= 1
+            if not known[2]:
+                del self._serials[id(evicted)]
+
+
+def _weight(result: Any) -> int:
+    """Roughly how many vertices and edges result holds. A lazy graph only stores
+    the parts that were materialized, its other parts weigh one."""
+    if isinstance(result, tuple) and len(result) == 2:
+        return sum(len(part) for part in result)
+    parts = getattr(result, "parts", None)
+    if parts is not None:
+        return sum(
+            _weight(getattr(p.shape, "graph", None)) + len(p.removed) for p in parts
+        )
+    if hasattr(result, "num_edges"):
+        return result.num_vertices + result.num_edges
+    if hasattr(result, "__len__"):
+        return len(result)
+    return 1
+
+
+def memoized_dsl(dsl: DSL, cache: MemoCache) -> DSL:
+    """dsl with every function going through cache."""
+    return DSL([_memoized(fn, cache) for fn in dsl.functions], dsl.types)
+
+
+def _memoized(fn: Callable, cache: MemoCache) -> Callable:
+    @wraps(fn)
+    def call(*args, **kwargs):
+        if kwargs:
+            cache.stats.uncached += 1
+            return fn(*args, **kwargs)
+        return cache.call(fn, args)
+
+    return call
@@ -1,68 +1,236 @@
-import networkx as nx
-from dsl.graph_dsl import Graph
-
-
-def from_adjacency_matrix(matrix: list[list[int]]) -> Graph:
-    n = len(matrix)
-    vertices = list(range(n))
-    edges = []
-
-    for i in range(n):
-        for j in range(n):
-            if matrix[i][j] != matrix[j][i]:
-                raise ValueError(
-                    f"Matrix is not symmetric at position ({i},{j}): {matrix[i][j]} != {matrix[j][i]}"
-                )
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+import warnings
 
-    for i in range(n):
-        for j in range(i, n):
-            if matrix[i][j] == 1:
-                edges.append((i, j))
-
-    return (vertices, edges)
-
-
-def from_graph(graph: Graph) -> list[list[int]]:
+import networkx as nx
+import numpy as np
+
+from dsl.graph_dsl import Edge, Graph
+from dsl.compact_graph import CompactGraph, to_graph
+from dsl.lazy_graph import LazyGraph
+
+
+def _coo_edges(rows, cols, n: int) -> list[Edge]:
+    """Upper-triangle edges of a symmetric COO pattern, in row-major order."""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    keys = rows * n + cols
+    missing = ~np.isin(keys, cols * n + rows)
+    if missing.any():
+        k = int(np.argmax(missing))
+        i, j = int(rows[k]), int(cols[k])
+        raise ValueError(f"Matrix is not symmetric at position ({i},{j}): 1 != 0")
+    upper = np.unique(keys[rows <= cols])
+    return list(zip((upper // n).tolist(), (upper % n).tolist()))
+
+
+def from_adjacency_matrix(matrix) -> Graph:
+    """matrix may be a list of lists, a 2D array, or anything with a scipy-style
+    tocoo() (entries equal to 1 are edges)."""
+    if hasattr(matrix, "tocoo"):
+        coo = matrix.tocoo()
+        n = coo.shape[0]
+        ones = np.asarray(coo.data) == 1
+        return (list(range(n)), _coo_edges(coo.row[ones], coo.col[ones], n))
+
+    m = np.asarray(matrix)
+    n = len(m)
+    m = m.reshape(n, n) if n else m.reshape(0, 0)
+    asymmetric = m != m.T
+    if asymmetric.any():
+        i, j = (int(x) for x in np.argwhere(asymmetric)[0])
+        raise ValueError(
+            f"Matrix is not symmetric at position ({i},{j}): {m[i, j]} != {m[j, i]}"
+        )
+    i, j = np.nonzero(np.triu(m == 1))
+    return (list(range(n)), list(zip(i.tolist(), j.tolist())))
+
+
+def from_edge_array(num_vertices: int, edges) -> Graph:
+    """Graph on vertices 0..num_vertices-1 from an E x 2 array of (i, j) pairs."""
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    return (list(range(num_vertices)), [(a, b) for a, b in edges.tolist()])
+
+
+def to_edge_array(graph: Graph | CompactGraph) -> tuple[int, np.ndarray]:
+    """Sparse form of from_graph: the matrix size and an E x 2 int64 array of the
+    upper-triangle (i, j) positions that are 1, in row-major order.
+
+    Positions follow the order of the vertex list, and edges with an endpoint that is
+    not in it are dropped, exactly as in from_graph.
+    """
+    vertices, edges = to_graph(graph)
+    vs = np.asarray(vertices, dtype=np.int64).reshape(-1)
+    n = len(vs)
+    e = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if n == 0 or len(e) == 0:
+        return n, np.empty((0, 2), dtype=np.int64)
+
+    # A repeated vertex maps to its last position, like a {v: i} dict would.
+    order = np.argsort(vs, kind="stable")
+    sorted_vs = vs[order]
+    pos = np.searchsorted(sorted_vs, e, side="right") - 1
+    found = (pos >= 0) & (sorted_vs[np.maximum(pos, 0)] == e)
+    keep = found.all(axis=1)
+    idx = order[pos[keep]]
+    idx = np.sort(idx, axis=1)
+    keys = np.unique(idx[:, 0] * n + idx[:, 1])
+    return n, np.column_stack([keys // n, keys % n])
+
+
+def to_csr(graph: Graph | CompactGraph) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric CSR pattern (indptr, indices) of the adjacency matrix."""
+    n, upper = to_edge_array(graph)
+    off_diagonal = upper[upper[:, 0] != upper[:, 1]]
+    rows = np.concatenate([upper[:, 0], off_diagonal[:, 1]])
+    cols = np.concatenate([upper[:, 1], off_diagonal[:, 0]])
+    order = np.lexsort((cols, rows))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))])
+    return indptr.astype(np.int64), cols[order]
+
+
+def from_csr(indptr, indices) -> Graph:
+    indptr = np.asarray(indptr, dtype=np.int64)
+    n = len(indptr) - 1
+    rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    return (list(range(n)), _coo_edges(rows, indices, n))
+
+
+def from_graph(graph: Graph | CompactGraph) -> list[list[int]]:
     """The order of vertices determines the ordering in the adjacency matrix."""
-    vertices, edges = graph
-    n = len(vertices)
-    index_of: dict[int, int] = {v: i for i, v in enumerate(vertices)}
-    matrix = [[0 for _ in range(n)] for _ in range(n)]
-
-    for a, b in edges:
-        if a not in index_of or b not in index_of:
-            continue
-        i = index_of[a]
-        j = index_of[b]
-        matrix[i][j] = 1
-        matrix[j][i] = 1
-
-    return matrix
-
-
-def are_graphs_equal(g1: Graph, g2: Graph) -> bool:
-    v1, e1 = g1
-    v2, e2 = g2
+    n, upper = to_edge_array(graph)
+    matrix = np.zeros((n, n), dtype=np.int8)
+    matrix[upper[:, 0], upper[:, 1]] = 1
+    matrix[upper[:, 1], upper[:, 0]] = 1
+    return matrix.tolist()
+
+
+@dataclass
+class GraphComparison:
+    """Outcome of compare_graphs, with the name of the check that decided it."""
+
+    equal: bool
+    stage: str
+
+
+# Cheapest first. Everything before "isomorphism" is an invariant, so a mismatch
+# there proves the graphs differ and VF2 never has to run.
+COMPARISON_STAGES = (
+    "labeled",
+    "vertex_count",
+    "edge_count",
+    "degree_sequence",
+    "triangles",
+    "wl_hash",
+    "isomorphism",
+)
+
+
+def _to_nx(vertices, edges) -> nx.Graph:
+    g = nx.Graph()
+    g.add_nodes_from(vertices)
+    g.add_edges_from(edges)
+    return g
+
+
+def _degree_sequence(nodes: set, edges: set[frozenset]) -> list[int]:
+    degree = Counter({v: 0 for v in nodes})
+    for e in edges:
+        if len(e) == 1:
+            (a,) = e
+            degree[a] += 2
+        else:
+            a, b = e
+            degree[a] += 1
+            degree[b] += 1
+    return sorted(degree.values())
+
+
+def _wl_hash(g: nx.Graph) -> str:
+    with warnings.catch_warnings():
+        # networkx >= 3.5 warns that unlabeled hashes changed; we only ever
+        # compare hashes computed by the same installed version.
+        warnings.simplefilter("ignore", UserWarning)
+        return nx.weisfeiler_lehman_graph_hash(g)
+
+
+def _compare_lazy_counts(
+    graph: LazyGraph,
+    num_vertices: int,
+    num_edges: int,
+    degree_sequence: Callable[[], list[int]],
+) -> GraphComparison | None:
+    """Checks the counting invariants of a LazyGraph from its symbolic form, so a
+    mismatch is found without materializing its edges. None if they all match, or if
+    the graph cannot count symbolically."""
+    if not graph.disjoint:
+        return None
+    if graph.num_vertices != num_vertices:
+        return GraphComparison(False, "vertex_count")
+    if graph.num_edges != num_edges:
+        return GraphComparison(False, "edge_count")
+    if graph.degree_sequence() != degree_sequence():
+        return GraphComparison(False, "degree_sequence")
+    return None
+
+
+def _lazy_mismatch(lazy: LazyGraph, other) -> GraphComparison | None:
+    vertices, edges = to_graph(other)
+    normalized = set(frozenset([a, b]) for a, b in edges)
+    nodes = set(vertices).union(*normalized)
+    return _compare_lazy_counts(
+        lazy, len(nodes), len(normalized), lambda: _degree_sequence(nodes, normalized)
+    )
+
+
+def compare_graphs(
+    g1: Graph | CompactGraph | LazyGraph, g2: Graph | CompactGraph | LazyGraph
+) -> GraphComparison:
+    for lazy, other in ((g1, g2), (g2, g1)):
+        if isinstance(lazy, LazyGraph) and not isinstance(other, LazyGraph):
+            mismatch = _lazy_mismatch(lazy, other)
+            if mismatch is not None:
+                return mismatch
+
+    v1, e1 = to_graph(g1)
+    v2, e2 = to_graph(g2)
 
     e1_normalized = set(frozenset([a, b]) for a, b in e1)
     e2_normalized = set(frozenset([a, b]) for a, b in e2)
 
     if set(v1) == set(v2) and e1_normalized == e2_normalized:
-        return True
+        return GraphComparison(True, "labeled")
+
+    # Edges may mention vertices missing from the vertex list; networkx adds them.
+    nodes1 = set(v1).union(*e1_normalized)
+    nodes2 = set(v2).union(*e2_normalized)
+    if len(nodes1) != len(nodes2):
+        return GraphComparison(False, "vertex_count")
+    if len(e1_normalized) != len(e2_normalized):
+        return GraphComparison(False, "edge_count")
+    if _degree_sequence(nodes1, e1_normalized) != _degree_sequence(
+        nodes2, e2_normalized
+    ):
+        return GraphComparison(False, "degree_sequence")
+
+    nx_g1 = _to_nx(v1, e1)
+    nx_g2 = _to_nx(v2, e2)
+
+    if sorted(nx.triangles(nx_g1).values()) != sorted(nx.triangles(nx_g2).values()):
+        return GraphComparison(False, "triangles")
+    if _wl_hash(nx_g1) != _wl_hash(nx_g2):
+        return GraphComparison(False, "wl_hash")
 
-    nx_g1 = nx.Graph()
-    nx_g1.add_nodes_from(v1)
-    nx_g1.add_edges_from(e1)
+    return GraphComparison(nx.is_isomorphic(nx_g1, nx_g2), "isomorphism")
 
-    nx_g2 = nx.Graph()
-    nx_g2.add_nodes_from(v2)
-    nx_g2.add_edges_from(e2)
 
-    return nx.is_isomorphic(nx_g1, nx_g2)
+def are_graphs_equal(g1: Graph | CompactGraph, g2: Graph | CompactGraph) -> bool:
+    return compare_graphs(g1, g2).equal
 
 
-def get_naive_cost(graph: Graph) -> int:
-    vertices, edges = graph
+def get_naive_cost(graph: Graph | CompactGraph) -> int:
+    vertices, edges = to_graph(graph)
     V, E = len(vertices), len(edges)
 
     def _by_adding_edges() -> int:
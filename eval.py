@@ -1,18 +1,117 @@
-from dataclasses import dataclass
-import json
+from concurrent.futures import Future
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, asdict, field, replace
+from pathlib import Path
+from functools import partial
+from typing import Any, Callable, Iterator
+import asyncio
+import sys
+import time
+import tracemalloc
 
-from dsl.graph_dsl import Graph, GRAPH_DSL
-from dsl.utils import from_adjacency_matrix, are_graphs_equal
-from dsl.dsl import parse_program, get_program_cost
+try:
+    import resource
+except ImportError:  # not available on Windows, max_rss_bytes stays None there
+    resource = None
+
+from openai import AsyncOpenAI
+
+from dsl.graph_dsl import Graph
+from dsl.compact_graph import to_graph
+from dsl.backends import MATERIALIZING_BACKENDS, get_graph_dsl
+from dsl.utils import compare_graphs
+from dsl.dsl import (
+    parse_program_source,
+    get_program_cost,
+    program_fingerprint,
+    run_program,
+)
+from dsl.analysis import MAX_PREDICTED_EDGES, analyze_program
+from dsl.memo import MemoCache, MemoStats, memoized_dsl
+from dsl.canonical import (
+    GraphCertificate,
+    graph_certificate,
+    compare_with_certificate,
+    certificate_cache_key,
+)
+from rate_limiter import RateLimiter
+from sandbox import SandboxPool, SandboxTimeout, SandboxCrashed
 from utils import (
     construct_prompt,
     parse_response,
     log_result,
-    batch_request,
+    completed_results,
+    results_store,
+    stream_requests,
+    load_json,
+    save_json,
     ChatResult,
+    ChatFailure,
+    ResponseCache,
     Sample,
 )
 
+CERTIFICATE_CACHE = Path(__file__).resolve().parent / "cache" / "certificates.json"
+
+# Generated graphs with more edges than this are not kept on the result. A lazy
+# backend can reject a K_20000 answer on its counts, and logging it would build the
+# 200M edges anyway.
+MAX_STORED_EDGES = 1_000_000
+
+# Memo cache of every backend, shared by the responses graded in this process. A
+# SandboxPool only keeps them across responses with reuse_workers, which
+# run_evaluation_async turns on for config.memoize; each worker has its own caches.
+MEMO_CACHES: dict[str, MemoCache] = {}
+
+
+# The stages of evaluate_chat_result, in the order they run.
+EVALUATION_STAGES = (
+    "parse_response",
+    "parse_program",
+    "cost",
+    "analyze",
+    "exec",
+    "compress",
+    "compare",
+)
+
+
+@dataclass
+class StageProfile:
+    """Wall time and peak memory of each stage of evaluate_chat_result that ran.
+
+    Memory per stage is the peak of tracemalloc's traced memory above what was
+    allocated when the stage started, so it only counts allocations made through
+    Python (numpy's included). Tracing makes grading several times slower, so it is
+    off unless asked for. max_rss_bytes is the peak resident size of the grading
+    process, which is cheap to read and, in a sandbox child, covers one response.
+    """
+
+    seconds: dict[str, float] = field(default_factory=dict)
+    peak_bytes: dict[str, int] = field(default_factory=dict)
+    # Memo cache lookups while building the graph, when memoized.
+    memo: MemoStats | None = None
+    max_rss_bytes: int | None = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            start_bytes, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = time.perf_counter() - start
+            if tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                self.peak_bytes[name] = max(0, peak - start_bytes)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
 
 @dataclass
 class InvalidDSL:
@@ -20,23 +119,43 @@ class InvalidDSL:
     sample_index: int
     response: ChatResult
     error: str
+    profile: StageProfile | None = None
 
 
 @dataclass
 class IncorrectReconstruction:
     sample: Sample
     sample_index: int
-    generated_graph: Graph
+    generated_graph: Graph | None
     response: ChatResult
+    equality_stage: str | None = None
+    profile: StageProfile | None = None
 
 
 @dataclass
 class Success:
     sample: Sample
     sample_index: int
-    generated_graph: Graph
+    generated_graph: Graph | None
     generated_cost: int
     response: ChatResult
+    equality_stage: str | None = None
+    profile: StageProfile | None = None
+
+
+@dataclass
+class Timeout:
+    sample: Sample
+    sample_index: int
+    response: ChatResult
+    limit_seconds: float
+
+
+@dataclass
+class RequestFailed:
+    sample: Sample
+    sample_index: int
+    failure: ChatFailure
 
 
 @dataclass
@@ -44,9 +163,15 @@ class Config:
     model: str
     reasoning_effort: str
     num_samples: int
+    backend: str = "python"
+    trace_memory: bool = False
+    # Memoize DSL calls across the responses a grading worker sees, see MEMO_CACHES.
+    memoize: bool = False
+    # Grade a program once per sample, see program_fingerprint.
+    dedup: bool = True
 
 
-Result = Success | IncorrectReconstruction | InvalidDSL
+Result = Success | IncorrectReconstruction | InvalidDSL | Timeout | RequestFailed
 
 
 @dataclass
@@ -60,61 +185,146 @@ def evaluate_chat_result(
     sample: Sample,
     sample_index: int,
     expected_graph: Graph,
+    backend: str = "python",
+    expected_certificate: GraphCertificate | None = None,
+    trace_memory: bool = False,
+    memoize: bool = False,
 ) -> Result:
-    import linecache
+    """Grades one response. The result carries the time and, with trace_memory, the
+    peak memory of every stage that ran. With memoize, DSL calls go through the
+    process's MEMO_CACHES, and the profile counts the lookups."""
+    profile = StageProfile()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        result = _evaluate_chat_result(
+            response,
+            sample,
+            sample_index,
+            expected_graph,
+            backend,
+            expected_certificate,
+            profile,
+            memoize,
+        )
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    profile.max_rss_bytes = _max_rss_bytes()
+    result.profile = profile
+    return result
 
-    code = parse_response(response.content)
 
-    dsl_env: dict[str, object] = {fn.__name__: fn for fn in GRAPH_DSL.functions}
-    dsl_env.update({"Graph": Graph})
+def _max_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
 
-    filename = f"<compress:{sample.name}>"
-    code_str = code if code.endswith("\n") else code + "\n"
-    linecache.cache[filename] = (
-        len(code_str),
-        None,
-        code_str.splitlines(True),
-        filename,
-    )
+
+def _evaluate_chat_result(
+    response: ChatResult,
+    sample: Sample,
+    sample_index: int,
+    expected_graph: Graph,
+    backend: str,
+    expected_certificate: GraphCertificate | None,
+    profile: StageProfile,
+    memoize: bool,
+) -> Success | IncorrectReconstruction | InvalidDSL:
+    with profile.stage("parse_response"):
+        code = parse_response(response.content)
+
+    dsl = get_graph_dsl(backend)
 
     try:
-        exec(
-            compile(code_str, filename=filename, mode="exec"),
-            dsl_env,
-        )
-    except Exception as e:
+        with profile.stage("parse_program"):
+            program = parse_program_source(code)
+        with profile.stage("cost"):
+            generated_cost = get_program_cost(program)
+    except KeyError:
         return InvalidDSL(
             sample=sample,
             sample_index=sample_index,
             response=response,
-            error=str(e),
+            error="compress_not_defined",
         )
-
-    try:
-        compress = dsl_env["compress"]
-        if not callable(compress):
-            raise KeyError("compress is not callable")
-    except KeyError:
+    except Exception as e:
         return InvalidDSL(
             sample=sample,
             sample_index=sample_index,
             response=response,
-            error="compress_not_defined",
+            error=str(e),
         )
 
-    try:
-        program = parse_program(compress)
-        generated_cost = get_program_cost(program)
-    except Exception as e:
+    with profile.stage("analyze"):
+        analysis = analyze_program(program)
+    if (
+        backend in MATERIALIZING_BACKENDS
+        and analysis.min_edges_built > MAX_PREDICTED_EDGES
+    ):
         return InvalidDSL(
             sample=sample,
             sample_index=sample_index,
             response=response,
-            error=str(e),
+            error=(
+                f"program builds a graph with at least {analysis.min_edges_built} "
+                f"edges, more than the limit of {MAX_PREDICTED_EDGES}"
+            ),
+        )
+    if analysis.result is not None:
+        mismatch = analysis.result.mismatch(
+            *_expected_counts(expected_graph, expected_certificate)
         )
+        if mismatch is not None:
+            return IncorrectReconstruction(
+                sample=sample,
+                sample_index=sample_index,
+                generated_graph=None,
+                response=response,
+                equality_stage=f"static_{mismatch}",
+            )
+
+    # Exact programs are interpreted. Anything else (keyword arguments, module-level
+    # code, ...) is executed as Python and the function it defines is called.
+    # exec'd code could mutate the graphs a memo cache shares, so only interpreted
+    # programs are memoized.
+    memo = None
+    if memoize and program.exact:
+        memo = MEMO_CACHES.setdefault(backend, MemoCache())
+    run_dsl = memoized_dsl(dsl, memo) if memo is not None else dsl
+    compress: Callable[[], Any] = partial(run_program, program, run_dsl)
+    if not program.exact:
+        dsl_env: dict[str, object] = {fn.__name__: fn for fn in dsl.functions}
+        dsl_env.update({"Graph": Graph})
+        try:
+            with profile.stage("exec"):
+                exec(
+                    compile(code, filename=f"<compress:{sample.name}>", mode="exec"),
+                    dsl_env,
+                )
+        except Exception as e:
+            return InvalidDSL(
+                sample=sample,
+                sample_index=sample_index,
+                response=response,
+                error=str(e),
+            )
+        compress = dsl_env.get("compress")
+        if not callable(compress):
+            return InvalidDSL(
+                sample=sample,
+                sample_index=sample_index,
+                response=response,
+                error="compress_not_defined",
+            )
 
+    before = replace(memo.stats) if memo is not None else None
     try:
-        generated_graph = compress()
+        with profile.stage("compress"):
+            generated_graph = compress()
     except Exception as e:
         return InvalidDSL(
             sample=sample,
@@ -122,62 +332,385 @@ def evaluate_chat_result(
             response=response,
             error=str(e),
         )
+    finally:
+        if memo is not None:
+            profile.memo = memo.stats - before
 
-    is_correct = are_graphs_equal(generated_graph, expected_graph)
-    if is_correct:
+    with profile.stage("compare"):
+        if expected_certificate is not None:
+            comparison = compare_with_certificate(
+                generated_graph, expected_graph, expected_certificate
+            )
+        else:
+            comparison = compare_graphs(generated_graph, expected_graph)
+    if comparison.equal:
         return Success(
             sample=sample,
             sample_index=sample_index,
-            generated_graph=generated_graph,
+            generated_graph=_stored_graph(generated_graph),
             generated_cost=generated_cost,
             response=response,
+            equality_stage=comparison.stage,
         )
 
     return IncorrectReconstruction(
         sample=sample,
         sample_index=sample_index,
-        generated_graph=generated_graph,
+        generated_graph=_stored_graph(generated_graph),
         response=response,
+        equality_stage=comparison.stage,
     )
 
 
-def run_evaluation(
-    config: Config, samples: list[Sample], skip_if_exists: bool = False
+def _expected_counts(
+    expected_graph: Graph, certificate: GraphCertificate | None
+) -> tuple[int, int]:
+    """Vertex and edge count as compare_graphs counts them."""
+    if certificate is not None:
+        return certificate.num_vertices, certificate.num_edges
+    vertices, edges = expected_graph
+    normalized = set(frozenset([a, b]) for a, b in edges)
+    return len(set(vertices).union(*normalized)), len(normalized)
+
+
+def _stored_graph(graph) -> Graph | None:
+    """The generated graph as lists, or None past MAX_STORED_EDGES."""
+    if getattr(graph, "num_edges", 0) > MAX_STORED_EDGES:
+        return None
+    return to_graph(graph)
+
+
+def summarize_profiles(results: list[Result | None]) -> str:
+    """Share of grading time per stage, the stage with the highest peak memory, the
+    largest grading process, and the memo hit rate of memoized runs."""
+    seconds = {stage: 0.0 for stage in EVALUATION_STAGES}
+    peak_stage, peak_bytes = None, 0
+    max_rss = 0
+    memo = MemoStats()
+    for r in results:
+        profile = getattr(r, "profile", None)
+        if profile is None:
+            continue
+        if profile.memo is not None:
+            memo.hits += profile.memo.hits
+            memo.misses += profile.memo.misses
+        for stage, s in profile.seconds.items():
+            seconds[stage] += s
+        max_rss = max(max_rss, profile.max_rss_bytes or 0)
+        for stage, b in profile.peak_bytes.items():
+            if b > peak_bytes:
+                peak_stage, peak_bytes = stage, b
+    total = sum(seconds.values())
+    if not total:
+        return "No grading time recorded."
+    shares = ", ".join(f"{stage} {s / total:.0%}" for stage, s in seconds.items() if s)
+    summary = f"Grading took {total:.2f}s: {shares}."
+    if peak_stage is not None:
+        summary += f" Peak memory {peak_bytes / 2**20:.1f} MiB in {peak_stage}."
+    if max_rss:
+        summary += f" Largest grading process {max_rss / 2**20:.1f} MiB."
+    if memo.lookups:
+        summary += f" Memo hit rate {memo.hit_rate:.0%} of {memo.lookups} DSL calls."
+    return summary
+
+
+def sandboxed_result(
+    future: Future,
+    response: ChatResult,
+    sample: Sample,
+    sample_index: int,
+    pool: SandboxPool,
+) -> Result:
+    """Result of an evaluate_chat_result call submitted to a SandboxPool."""
+    try:
+        return future.result()
+    except SandboxTimeout:
+        return Timeout(
+            sample=sample,
+            sample_index=sample_index,
+            response=response,
+            limit_seconds=pool.limits.timeout_seconds,
+        )
+    except SandboxCrashed as e:
+        return InvalidDSL(
+            sample=sample,
+            sample_index=sample_index,
+            response=response,
+            error=str(e),
+        )
+
+
+def _fanned_out(result: Result, response: ChatResult) -> Result:
+    """result, graded for another response with the same program. Nothing was graded
+    for this one, so it has no profile."""
+    if hasattr(result, "profile"):
+        return replace(result, response=response, profile=None)
+    return replace(result, response=response)
+
+
+def load_expected_certificates(
+    samples: list[Sample], cache_path: Path = CERTIFICATE_CACHE
+) -> list[GraphCertificate]:
+    """Certificates of every sample's expected graph, computed once and cached on disk."""
+    cache: dict[str, dict] = load_json(str(cache_path)) if cache_path.exists() else {}
+    certificates: list[GraphCertificate] = []
+    dirty = False
+    for s in samples:
+        key = certificate_cache_key(s.name, s.digest()[:16])
+        if key not in cache:
+            expected = s.graph()
+            cache[key] = asdict(graph_certificate(expected))
+            dirty = True
+        certificates.append(GraphCertificate.from_dict(cache[key]))
+    if dirty:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        save_json(str(cache_path), cache)
+    return certificates
+
+
+async def run_evaluation_async(
+    config: Config,
+    samples: list[Sample],
+    skip_if_exists: bool = False,
+    pool: SandboxPool | None = None,
+    rate_limiter: RateLimiter | None = None,
+    response_cache: ResponseCache | None = None,
+    resume: bool = False,
+    client: AsyncOpenAI | None = None,
 ) -> list[SampleResults]:
+    """Model responses are graded in a SandboxPool, so a response that hangs or eats
+    all memory only costs its own time and memory limit.
+
+    Grading is streamed: every completion is submitted to the pool and logged as soon
+    as it arrives, so it overlaps the API calls still in flight and a failure late in
+    the batch only loses the responses that had not come back yet.
+
+    With a response_cache, completions from earlier runs are re-graded without
+    calling the API again. With resume, (sample, repeat) pairs that already have a
+    result on disk are not dispatched at all and are left out of the returned
+    responses.
+
+    With config.dedup, a response whose program has the same program_fingerprint as
+    an earlier response to the same sample is not graded again. It gets a copy of
+    that result without a profile, and is logged like any other.
+
+    With config.memoize, an own pool keeps its workers, so their memo caches serve
+    every response they grade. A pool that is passed in is used as it is.
+    """
     expected_graphs: list[Graph] = []
     flattened_prompts: list[str] = []
     index_map: list[int] = []
+    repeat_map: list[int] = []
 
+    completed = (
+        completed_results(config.model, config.reasoning_effort) if resume else set()
+    )
+    system_prompt, _ = construct_prompt(graph="")
     for i, s in enumerate(samples):
-        matrix = s.adjacency_matrix
-        expected_graphs.append(from_adjacency_matrix(matrix))
-        system_prompt, user_prompt = construct_prompt(graph=json.dumps(matrix))
-        for _ in range(config.num_samples):
+        expected_graphs.append(s.graph())
+        _, user_prompt = construct_prompt(graph=s.matrix_json())
+        for repeat in range(config.num_samples):
+            if (s.name, repeat) in completed:
+                continue
             flattened_prompts.append(user_prompt)
             index_map.append(i)
+            repeat_map.append(repeat)
+    if resume:
+        skipped = len(samples) * config.num_samples - len(flattened_prompts)
+        print(f"Resuming {config.model}: {skipped} responses already logged.")
 
-    responses = batch_request(
-        system_prompt,
-        flattened_prompts,
-        model=config.model,
-        reasoning_effort=config.reasoning_effort,
-    )
+    certificates = load_expected_certificates(samples)
+    results_by_index: list[Result | None] = [None] * len(flattened_prompts)
 
-    grouped: list[list[Result]] = [[] for _ in samples]
-    for resp, sample_idx in zip(responses, index_map):
+    owns_pool = pool is None
+    pool = pool or SandboxPool(reuse_workers=config.memoize)
+    store = results_store(config.model, config.reasoning_effort)
+
+    # (sample, program fingerprint) -> result of the first response with that program
+    graded: dict[tuple[int, str], asyncio.Future[Result]] = {}
+    duplicates: list[int] = []
+
+    async def _sandboxed(resp: ChatResult, s: Sample, sample_idx: int) -> Result:
+        fut = pool.submit(
+            evaluate_chat_result,
+            resp,
+            s,
+            sample_idx,
+            expected_graphs[sample_idx],
+            config.backend,
+            certificates[sample_idx],
+            config.trace_memory,
+            config.memoize,
+        )
+        with suppress(Exception):
+            await asyncio.wrap_future(fut)
+        return sandboxed_result(fut, resp, s, sample_idx, pool)
+
+    async def _grade(idx: int, resp: ChatResult | ChatFailure) -> None:
+        sample_idx = index_map[idx]
         s = samples[sample_idx]
-        eg = expected_graphs[sample_idx]
-        r = evaluate_chat_result(resp, s, sample_idx, eg)
-        grouped[sample_idx].append(r)
+        if isinstance(resp, ChatFailure):
+            # Not logged, so the sample is requested again on the next run.
+            results_by_index[idx] = RequestFailed(s, sample_idx, resp)
+            return
+        key = None
+        if config.dedup:
+            key = (sample_idx, program_fingerprint(parse_response(resp.content)))
+        if key in graded:
+            r = _fanned_out(await graded[key], resp)
+            duplicates.append(idx)
+        else:
+            grading = asyncio.ensure_future(_sandboxed(resp, s, sample_idx))
+            if key is not None:
+                graded[key] = grading
+            r = await grading
+        results_by_index[idx] = r
         log_result(
             config.model,
             config.reasoning_effort,
             r,
             skip_if_exists=skip_if_exists,
             status=type(r),
+            repeat=repeat_map[idx],
+            store=store,
+        )
+
+    grading: list[asyncio.Task] = []
+    try:
+        async for idx, resp in stream_requests(
+            system_prompt,
+            flattened_prompts,
+            model=config.model,
+            reasoning_effort=config.reasoning_effort,
+            rate_limiter=rate_limiter,
+            cache=response_cache,
+            sample_indices=repeat_map,
+            client=client,
+        ):
+            grading.append(asyncio.create_task(_grade(idx, resp)))
+    finally:
+        # Whatever already arrived still gets graded and logged.
+        await asyncio.gather(*grading)
+        store.close()
+        if owns_pool:
+            pool.shutdown()
+
+    failed = sum(isinstance(r, RequestFailed) for r in results_by_index)
+    if failed:
+        print(f"{failed} requests for {config.model} failed and were not logged.")
+    print(f"{config.model}: {summarize_profiles(results_by_index)}")
+    if duplicates:
+        print(
+            f"{len(duplicates)} responses repeated an earlier program for their "
+            "sample and reused its result."
         )
 
+    grouped: list[list[Result]] = [[] for _ in samples]
+    for r, sample_idx in zip(results_by_index, index_map):
+        grouped[sample_idx].append(r)
+
     sample_results: list[SampleResults] = [
         SampleResults(sample=s, responses=grouped[i]) for i, s in enumerate(samples)
     ]
     return sample_results
+
+
+def run_evaluation(
+    config: Config,
+    samples: list[Sample],
+    skip_if_exists: bool = False,
+    pool: SandboxPool | None = None,
+    rate_limiter: RateLimiter | None = None,
+    response_cache: ResponseCache | None = None,
+    resume: bool = False,
+    client: AsyncOpenAI | None = None,
+) -> list[SampleResults]:
+    results = asyncio.run(
+        run_evaluation_async(
+            config,
+            samples,
+            skip_if_exists=skip_if_exists,
+            pool=pool,
+            rate_limiter=rate_limiter,
+            response_cache=response_cache,
+            resume=resume,
+            client=client,
+        )
+    )
+    if response_cache is not None:
+        print(response_cache.summary())
+    return results
+
+
+async def run_sweep_async(
+    configs: list[Config],
+    samples: list[Sample],
+    skip_if_exists: bool = False,
+    rate_limiter: RateLimiter | None = None,
+    model_rate_limiters: dict[str, RateLimiter] | None = None,
+    response_cache: ResponseCache | None = None,
+    resume: bool = False,
+    client: AsyncOpenAI | None = None,
+) -> list[list[SampleResults]]:
+    """Runs every config concurrently in one event loop, so a sweep takes about as long
+    as its slowest model instead of the sum of all of them.
+
+    All requests go through one AsyncOpenAI client, and so one connection pool. A
+    config whose model is in model_rate_limiters is limited by that limiter (give
+    those limiters rate_limiter as their parent to keep the shared budget), every
+    other config by rate_limiter. Grading shares one SandboxPool.
+    """
+    model_rate_limiters = model_rate_limiters or {}
+    owns_client = client is None
+    client = client or AsyncOpenAI(max_retries=0)
+
+    async def _run(config: Config, pool: SandboxPool) -> list[SampleResults]:
+        results = await run_evaluation_async(
+            config,
+            samples,
+            skip_if_exists=skip_if_exists,
+            pool=pool,
+            rate_limiter=model_rate_limiters.get(config.model, rate_limiter),
+            response_cache=response_cache,
+            resume=resume,
+            client=client,
+        )
+        print(
+            f"Evaluation complete for {config.model} ({config.reasoning_effort}). Results saved to results/."
+        )
+        return results
+
+    try:
+        reuse_workers = any(c.memoize for c in configs)
+        with SandboxPool(reuse_workers=reuse_workers) as pool:
+            results = await asyncio.gather(*(_run(c, pool) for c in configs))
+    finally:
+        if owns_client:
+            await client.close()
+    if response_cache is not None:
+        print(response_cache.summary())
+    return results
+
+
+def run_sweep(
+    configs: list[Config],
+    samples: list[Sample],
+    skip_if_exists: bool = False,
+    rate_limiter: RateLimiter | None = None,
+    model_rate_limiters: dict[str, RateLimiter] | None = None,
+    response_cache: ResponseCache | None = None,
+    resume: bool = False,
+    client: AsyncOpenAI | None = None,
+) -> list[list[SampleResults]]:
+    return asyncio.run(
+        run_sweep_async(
+            configs,
+            samples,
+            skip_if_exists=skip_if_exists,
+            rate_limiter=rate_limiter,
+            model_rate_limiters=model_rate_limiters,
+            response_cache=response_cache,
+            resume=resume,
+            client=client,
+        )
+    )
@@ -1,18 +1,32 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import json
+import hashlib
 import inspect
-from typing import Any
+import os
+import sys
+from typing import Any, Callable
+
+import dsl.dsl
+import dsl.graph_dsl
+import dsl.utils
+from dsl.families import FamilyInstance, family_instances
 from dsl.samples import TEST_GRAPHS
-from dsl.utils import from_graph, get_naive_cost
+from dsl.utils import to_edge_array, get_naive_cost
 from dsl.dsl import parse_program, get_program_cost
+from utils import save_npz_dataset, load_npz_datapoints
 
 out = Path(__file__).resolve().parent / "data"
 out.mkdir(parents=True, exist_ok=True)
 
+# FamilyInstances stand in for builders that are generated at run time, since those
+# cannot be pickled for the process pool.
+Builder = tuple[str, Callable | FamilyInstance]
+
 
 def build_datapoint(name: str, fn) -> dict[str, Any]:
+    """The graph is stored as its upper-triangle edges, never as a dense matrix."""
     graph = fn()
-    matrix = from_graph(graph)
+    num_vertices, edges = to_edge_array(graph)
     prog = parse_program(fn)
     dsl_cost = get_program_cost(prog)
     naive_cost = get_naive_cost(graph)
@@ -20,7 +34,9 @@ def build_datapoint(name: str, fn) -> dict[str, Any]:
     src = inspect.getsource(fn)
     return {
         "name": name,
-        "adjacency_matrix": matrix,
+        "adjacency_matrix": None,
+        "num_vertices": num_vertices,
+        "edges": edges,
         "dsl_cost": dsl_cost,
         "naive_cost": naive_cost,
         "compression_ratio": ratio,
@@ -28,14 +44,84 @@ def build_datapoint(name: str, fn) -> dict[str, Any]:
     }
 
 
-def save_dataset():
-    dataset = []
-    for fn in TEST_GRAPHS:
-        name = fn.__name__
-        dp = build_datapoint(name, fn)
-        dataset.append(dp)
-        (out / f"{name}.json").write_text(json.dumps(dp, indent=2))
+def _generator_version() -> str:
+    """Changes whenever the DSL, the cost model or build_datapoint change, so every
+    datapoint is rebuilt then."""
+    sources = [inspect.getsource(m) for m in (dsl.dsl, dsl.graph_dsl, dsl.utils)]
+    sources.append(inspect.getsource(build_datapoint))
+    return hashlib.sha256("".join(sources).encode()).hexdigest()
+
+
+def _builder_function(fn: Callable | FamilyInstance) -> Callable:
+    return fn.builder() if isinstance(fn, FamilyInstance) else fn
+
+
+def source_hash(fn: Callable | FamilyInstance, version: str) -> str:
+    source = inspect.getsource(_builder_function(fn))
+    return hashlib.sha256((version + source).encode()).hexdigest()
+
+
+def _build(builder: Builder) -> dict[str, Any]:
+    name, fn = builder
+    return build_datapoint(name, _builder_function(fn))
+
+
+def scaling_builders(max_size: int | None = None) -> list[Builder]:
+    """The parametric families of dsl.families at every scaling size."""
+    return [(inst.name, inst) for inst in family_instances(max_size=max_size)]
+
+
+def save_dataset(
+    builders: list[Builder] | None = None,
+    path: Path = out / "dataset.npz",
+    max_workers: int | None = None,
+    force: bool = False,
+) -> list[str]:
+    """Rebuilds only the datapoints whose builder source changed since the last run,
+    in a process pool, and returns their names.
+
+    Datapoints of builders that are no longer listed are dropped from the dataset.
+    """
+    if builders is None:
+        builders = [(fn.__name__, fn) for fn in TEST_GRAPHS]
+    version = _generator_version()
+    hashes = {name: source_hash(fn, version) for name, fn in builders}
+
+    existing: dict[str, dict[str, Any]] = {}
+    if path.exists() and not force:
+        existing = {dp["name"]: dp for dp in load_npz_datapoints(path)}
+    stale = [
+        (name, fn)
+        for name, fn in builders
+        if existing.get(name, {}).get("source_hash") != hashes[name]
+    ]
+
+    workers = max_workers or os.cpu_count() or 1
+    if len(stale) > 1 and workers > 1:
+        chunksize = max(1, len(stale) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            datapoints = list(pool.map(_build, stale, chunksize=chunksize))
+    else:
+        datapoints = [_build(b) for b in stale]
+    built = {name: dp for (name, _), dp in zip(stale, datapoints)}
+
+    if stale or set(existing) != set(hashes):
+        dataset = [
+            (built[name] if name in built else existing[name])
+            | {"source_hash": hashes[name]}
+            for name, _ in builders
+        ]
+        save_npz_dataset(dataset, path)
+    return [name for name, _ in stale]
 
 
 if __name__ == "__main__":
-    save_dataset()
+    if "--scaling" in sys.argv:
+        builders = scaling_builders()
+        rebuilt = save_dataset(
+            builders, out / "scaling.npz", force="--force" in sys.argv
+        )
+    else:
+        builders = [(fn.__name__, fn) for fn in TEST_GRAPHS]
+        rebuilt = save_dataset(builders, force="--force" in sys.argv)
+    print(f"Rebuilt {len(rebuilt)} of {len(builders)} datapoints.")
@@ -0,0 +1,132 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+from weakref import WeakKeyDictionary
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Holds up to `capacity` units and refills at `capacity` per minute.
+
+    The level may go negative when a request turned out bigger than estimated; later
+    callers then wait for the debt to be paid back.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.refill_per_second = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(
+            self.capacity, self.level + (now - self.updated) * self.refill_per_second
+        )
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.refill_per_second)
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Reservation:
+    estimated_tokens: int
+    used_tokens: int | None = None
+
+
+class RateLimiter:
+    """Requests-per-minute, tokens-per-minute and in-flight limits for API calls.
+
+    One limiter is meant to be shared by every batch that talks to the same provider
+    account, so they all draw from the same budget. Token usage is estimated up front
+    and reconciled with the real usage once the response is back.
+
+    With a parent, a request also has to fit the parent's limits, e.g. per-model
+    limiters sharing one account-wide budget.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        tokens_per_minute: float | None = None,
+        max_in_flight: int | None = None,
+        completion_tokens_estimate: int = 2048,
+        parent: "RateLimiter | None" = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_in_flight = max_in_flight
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self.parent = parent
+        # asyncio primitives are bound to one event loop; sequential asyncio.run
+        # calls each get their own.
+        self._locks: WeakKeyDictionary = WeakKeyDictionary()
+        self._slots: WeakKeyDictionary = WeakKeyDictionary()
+
+    def estimate_tokens(self, *prompts: str) -> int:
+        """Rough count: ~4 characters per token plus the expected completion."""
+        return sum(len(p) for p in prompts) // 4 + self.completion_tokens_estimate
+
+    def _lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if loop not in self._locks:
+            self._locks[loop] = asyncio.Lock()
+        return self._locks[loop]
+
+    def _slot(self) -> asyncio.Semaphore | None:
+        if self.max_in_flight is None:
+            return None
+        loop = asyncio.get_running_loop()
+        if loop not in self._slots:
+            self._slots[loop] = asyncio.Semaphore(self.max_in_flight)
+        return self._slots[loop]
+
+    async def _take_budget(self, tokens: int) -> None:
+        # Waiters queue on the lock, so the budget is handed out first come first served.
+        async with self._lock():
+            while True:
+                wait = max(
+                    self.requests.wait_time(1) if self.requests else 0.0,
+                    self.tokens.wait_time(tokens) if self.tokens else 0.0,
+                )
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(tokens)
+
+    @asynccontextmanager
+    async def limit(self, estimated_tokens: int) -> AsyncIterator[Reservation]:
+        """Waits for a slot and budget. Set `used_tokens` on the yielded reservation
+        to settle the token estimate against what the request actually used."""
+        slot = self._slot()
+        if slot is not None:
+            await slot.acquire()
+        try:
+            await self._take_budget(estimated_tokens)
+            reservation = Reservation(estimated_tokens=estimated_tokens)
+            if self.parent is None:
+                yield reservation
+            else:
+                async with self.parent.limit(estimated_tokens) as shared:
+                    yield reservation
+                    shared.used_tokens = reservation.used_tokens
+            if self.tokens and reservation.used_tokens is not None:
+                self.tokens.refund(estimated_tokens - reservation.used_tokens)
+        finally:
+            if slot is not None:
+                slot.release()
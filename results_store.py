@@ -0,0 +1,257 @@
+"""Append-only store for evaluation results.
+
+Every run appends its results to its own JSONL segment under
+results/<model>/segments/, a batch of lines at a time. compact() folds the segments
+(and the one-JSON-per-sample files older runs wrote) into a single results.parquet
+per model, and load_results_frame() reads everything back as one DataFrame.
+
+A row keeps the scalar fields of a result as columns, for quick filtering, and the
+whole result as a JSON string in `payload`. The stage timings of a result become
+seconds_<stage> and peak_bytes_<stage> columns, the grading process's peak resident
+size max_rss_bytes, and the memo lookups of a memoized run memo_hits and
+memo_misses. The sample's adjacency matrix is left out of the payload; it is already
+in data/ under the sample's name.
+
+Parquet needs pyarrow, which is a dependency of the project. Where it is missing
+(HAS_PARQUET is False), compact() writes results.jsonl instead and everything else
+works the same.
+"""
+
+from dataclasses import asdict, is_dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+
+    HAS_PARQUET = True
+except ImportError:  # compacted results are written as JSONL instead
+    HAS_PARQUET = False
+
+RESULTS_ROOT = Path(__file__).resolve().parent / "results"
+
+KEY_COLUMNS = ["name", "repeat"]
+
+
+def result_payload(result: Any, status: type[Any]) -> dict[str, Any]:
+    return (asdict(result) if is_dataclass(result) else vars(result).copy()) | {
+        "status": status.__name__
+    }
+
+
+def payload_row(payload: dict[str, Any], repeat: int) -> dict[str, Any]:
+    payload = payload | {
+        "sample": {
+            k: v
+            for k, v in payload["sample"].items()
+            if k not in ("adjacency_matrix", "edges")
+        }
+    }
+    sample = payload["sample"]
+    usage = (payload.get("response") or {}).get("usage") or {}
+
+    row: dict[str, Any] = {
+        "name": sample["name"],
+        "repeat": repeat,
+        "dsl_cost": sample["dsl_cost"],
+        "naive_cost": sample["naive_cost"],
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "total_completion_tokens": usage.get("total_completion_tokens"),
+    }
+    for key, value in payload.items():
+        if value is None or isinstance(value, (str, int, float, bool)):
+            row[key] = value
+    profile = payload.get("profile") or {}
+    for stage, seconds in profile.get("seconds", {}).items():
+        row[f"seconds_{stage}"] = seconds
+    for stage, peak in profile.get("peak_bytes", {}).items():
+        row[f"peak_bytes_{stage}"] = peak
+    if profile.get("max_rss_bytes") is not None:
+        row["max_rss_bytes"] = profile["max_rss_bytes"]
+    memo = profile.get("memo") or {}
+    for count in ("hits", "misses"):
+        if count in memo:
+            row[f"memo_{count}"] = memo[count]
+    row["payload"] = json.dumps(payload)
+    return row
+
+
+def _read_jsonl(path: Path) -> list[dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _legacy_key(path: Path) -> tuple[str, int]:
+    name, sep, repeat = path.stem.rpartition("__")
+    if sep and repeat.isdigit():
+        return (name, int(repeat))
+    return (path.stem, 0)
+
+
+def _legacy_row(path: Path) -> dict[str, Any]:
+    """Row for a per-sample JSON file written before the store existed."""
+    with open(path) as f:
+        payload = json.load(f)
+    return payload_row(payload, _legacy_key(path)[1])
+
+
+class ResultsStore:
+    """Results of one model, appended in batches of flush_every rows.
+
+    Rows are buffered in memory, so a crash loses at most one batch; those samples are
+    simply graded again on resume. Close the store (or use it as a context manager)
+    to write the last batch.
+    """
+
+    def __init__(self, directory: Path, flush_every: int = 64):
+        self.directory = Path(directory)
+        self.flush_every = flush_every
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self.segment = self.directory / "segments" / f"{stamp}-{os.getpid()}.jsonl"
+        self._pending: list[dict[str, Any]] = []
+        self._keys: set[tuple[str, int]] | None = None
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def compacted_path(self) -> Path:
+        suffix = "parquet" if HAS_PARQUET else "jsonl"
+        return self.directory / f"results.{suffix}"
+
+    def _segments(self) -> list[Path]:
+        return sorted((self.directory / "segments").glob("*.jsonl"))
+
+    def _legacy_files(self) -> list[Path]:
+        return sorted(self.directory.glob("*.json"))
+
+    def append(self, row: dict[str, Any]) -> None:
+        self._pending.append(row)
+        if self._keys is not None:
+            self._keys.add((row["name"], row["repeat"]))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        self.segment.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.segment, "a") as f:
+            f.write("".join(json.dumps(row) + "\n" for row in self._pending))
+        self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+
+    def keys(self) -> set[tuple[str, int]]:
+        """(sample name, repeat) of every stored result, including unflushed ones."""
+        if self._keys is None:
+            keys = {_legacy_key(p) for p in self._legacy_files()}
+            compacted = self._read_compacted(KEY_COLUMNS)
+            if not compacted.empty:
+                keys.update(zip(compacted["name"], compacted["repeat"].astype(int)))
+            for segment in self._segments():
+                keys.update((r["name"], r["repeat"]) for r in _read_jsonl(segment))
+            keys.update((r["name"], r["repeat"]) for r in self._pending)
+            self._keys = keys
+        return self._keys
+
+    def _read_compacted(self, columns: list[str] | None) -> pd.DataFrame:
+        path = self.compacted_path
+        if not path.exists():
+            return pd.DataFrame()
+        if HAS_PARQUET:
+            if columns is not None:
+                available = set(pq.read_schema(path).names)
+                columns = [c for c in columns if c in available]
+            return pd.read_parquet(path, columns=columns)
+        return pd.DataFrame.from_records(_read_jsonl(path))
+
+    def load(self, columns: list[str] | None = None) -> pd.DataFrame:
+        """All stored rows, oldest first. A result logged twice keeps its latest row."""
+        recent = [row for segment in self._segments() for row in _read_jsonl(segment)]
+        frames = [
+            pd.DataFrame.from_records([_legacy_row(p) for p in self._legacy_files()]),
+            self._read_compacted(columns),
+            pd.DataFrame.from_records(recent + self._pending),
+        ]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns or KEY_COLUMNS)
+        frame = pd.concat(frames, ignore_index=True)
+        frame = frame.drop_duplicates(subset=KEY_COLUMNS, keep="last")
+        frame = frame.reset_index(drop=True)
+        return frame.reindex(columns=columns) if columns is not None else frame
+
+    def compact(self) -> None:
+        """Fold segments and legacy files into the compacted file, then delete them.
+
+        Do not run this while a run is still appending to the same model.
+        """
+        self.flush()
+        segments = self._segments()
+        legacy = self._legacy_files()
+        if not segments and not legacy:
+            return
+        frame = self.load()
+        path = self.compacted_path
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        if HAS_PARQUET:
+            frame.to_parquet(tmp, index=False)
+        else:
+            frame.to_json(tmp, orient="records", lines=True)
+        os.replace(tmp, path)
+        for p in [*segments, *legacy]:
+            p.unlink()
+        self._keys = None
+
+
+def load_results_frame(
+    results_root: Path = RESULTS_ROOT, columns: list[str] | None = None
+) -> pd.DataFrame:
+    """Every model's results in one frame, with the results directory name in a
+    `model` column."""
+    frames = []
+    if results_root.is_dir():
+        for model_dir in sorted(p for p in results_root.iterdir() if p.is_dir()):
+            frame = ResultsStore(model_dir).load(columns=columns)
+            if not frame.empty:
+                frames.append(frame.assign(model=model_dir.name))
+    if not frames:
+        return pd.DataFrame(columns=[*(columns or KEY_COLUMNS), "model"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def stage_summary(frame: pd.DataFrame) -> pd.DataFrame:
+    """Per model: mean seconds per evaluation stage (seconds_* columns), the largest
+    peak memory seen in each stage (peak_bytes_* columns), and the memo hit rate over
+    memoized responses (memo_hit_rate)."""
+    seconds = [c for c in frame.columns if c.startswith("seconds_")]
+    peaks = [c for c in frame.columns if c.startswith("peak_bytes_")]
+    if not seconds and not peaks:
+        return pd.DataFrame()
+    grouped = frame.groupby("model")
+    summary = pd.concat([grouped[seconds].mean(), grouped[peaks].max()], axis=1)
+    if {"memo_hits", "memo_misses"} <= set(frame.columns):
+        memo = grouped[["memo_hits", "memo_misses"]].sum()
+        lookups = memo["memo_hits"] + memo["memo_misses"]
+        summary["memo_hit_rate"] = memo["memo_hits"] / lookups.where(lookups > 0)
+    return summary
+
+
+def compact_results(results_root: Path = RESULTS_ROOT) -> None:
+    if results_root.is_dir():
+        for model_dir in sorted(p for p in results_root.iterdir() if p.is_dir()):
+            ResultsStore(model_dir).compact()
+
+
+if __name__ == "__main__":
+    compact_results()
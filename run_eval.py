@@ -1,5 +1,18 @@
-from eval import Config, run_evaluation
-from utils import get_samples
+from eval import Config, run_sweep
+from rate_limiter import RateLimiter
+from utils import get_samples, ResponseCache
+
+# Set these to the limits of your API account; every config draws from the same budget.
+REQUESTS_PER_MINUTE = 500
+TOKENS_PER_MINUTE = 500_000
+MAX_IN_FLIGHT = 64
+
+# Per-model limits on top of the shared budget, so one slow model cannot hold every
+# in-flight slot. MODEL_LIMITS overrides the default for individual models.
+MAX_IN_FLIGHT_PER_MODEL = 32
+MODEL_LIMITS: dict[str, dict] = {
+    "o3": {"max_in_flight": 16},
+}
 
 
 def main() -> None:
@@ -13,11 +26,29 @@ def main() -> None:
         Config(model="o3-mini", reasoning_effort="high", num_samples=1),
     ]
     samples = get_samples()
-    for config in configs:
-        run_evaluation(config, samples, skip_if_exists=True)
-        print(
-            f"Evaluation complete for {config.model} ({config.reasoning_effort}). Results saved to results/."
+    rate_limiter = RateLimiter(
+        requests_per_minute=REQUESTS_PER_MINUTE,
+        tokens_per_minute=TOKENS_PER_MINUTE,
+        max_in_flight=MAX_IN_FLIGHT,
+    )
+    model_rate_limiters = {
+        model: RateLimiter(
+            **MODEL_LIMITS.get(model, {"max_in_flight": MAX_IN_FLIGHT_PER_MODEL}),
+            parent=rate_limiter,
         )
+        for model in {c.model for c in configs}
+    }
+    # Completions are cached under cache/responses, so re-running after a crash or a
+    # grading change only pays for the requests that never came back.
+    run_sweep(
+        configs,
+        samples,
+        skip_if_exists=True,
+        rate_limiter=rate_limiter,
+        model_rate_limiters=model_rate_limiters,
+        response_cache=ResponseCache(),
+        resume=True,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+import multiprocessing
+import os
+import threading
+
+try:
+    import resource
+except ImportError:  # not available on Windows, memory limits are skipped there
+    resource = None
+
+
+class SandboxTimeout(Exception):
+    pass
+
+
+class SandboxCrashed(Exception):
+    pass
+
+
+@dataclass
+class SandboxLimits:
+    timeout_seconds: float = 30.0
+    memory_limit_mb: int | None = 2048
+
+
+_preload: set[str] = set()
+
+
+def _context(module: str) -> multiprocessing.context.BaseContext:
+    """forkserver avoids forking the (threaded) parent. The modules of the sandboxed
+    functions are preloaded into the server, so children start without re-importing
+    them; this only has an effect until the server has started. spawn is the
+    portable fallback."""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    ctx = multiprocessing.get_context("forkserver")
+    if module not in _preload:
+        _preload.add(module)
+        ctx.set_forkserver_preload(sorted(_preload))
+    return ctx
+
+
+def _limit_memory(memory_limit_mb: int | None) -> None:
+    if memory_limit_mb is not None and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _outcome(fn: Callable, args: tuple) -> tuple[str, Any]:
+    try:
+        return ("ok", fn(*args))
+    except BaseException as e:
+        return ("error", f"{type(e).__name__}: {e}")
+
+
+def _sandbox_main(conn, fn: Callable, args: tuple, memory_limit_mb: int | None):
+    _limit_memory(memory_limit_mb)
+    conn.send(_outcome(fn, args))
+    conn.close()
+
+
+def _worker_main(conn, memory_limit_mb: int | None):
+    """Runs the calls sent over conn until the parent closes it."""
+    _limit_memory(memory_limit_mb)
+    while True:
+        try:
+            fn, args = conn.recv()
+        except EOFError:
+            break
+        conn.send(_outcome(fn, args))
+    conn.close()
+
+
+def run_in_sandbox(fn: Callable, *args: Any, limits: SandboxLimits) -> Any:
+    """Run fn(*args) in a fresh child process and return its result.
+
+    The child is killed once limits.timeout_seconds has passed (SandboxTimeout) and
+    has its address space capped at limits.memory_limit_mb. fn, its arguments and
+    its result must be picklable. Anything the child raises, or the child dying
+    without answering, surfaces as SandboxCrashed.
+    """
+    ctx = _context(fn.__module__)
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_sandbox_main,
+        args=(sender, fn, args, limits.memory_limit_mb),
+        daemon=True,
+    )
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(limits.timeout_seconds):
+            process.kill()
+            raise SandboxTimeout(f"exceeded {limits.timeout_seconds}s")
+        try:
+            status, payload = receiver.recv()
+        except EOFError:
+            process.join()
+            raise SandboxCrashed(
+                f"evaluation process exited with code {process.exitcode}"
+            )
+    finally:
+        receiver.close()
+        process.join()
+    if status == "error":
+        raise SandboxCrashed(payload)
+    return payload
+
+
+class _Worker:
+    """A child process that runs one sandboxed call after another, so whatever the
+    calls leave in module state (like memo caches) carries over to the next."""
+
+    def __init__(self, module: str, memory_limit_mb: int | None):
+        ctx = _context(module)
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def call(self, fn: Callable, args: tuple, timeout_seconds: float) -> Any:
+        """Same contract as run_in_sandbox. After SandboxTimeout or a dead child
+        the worker is closed and must not be reused; after an exception raised by
+        fn it can be."""
+        try:
+            self.conn.send((fn, args))
+            if not self.conn.poll(timeout_seconds):
+                self.close()
+                raise SandboxTimeout(f"exceeded {timeout_seconds}s")
+            status, payload = self.conn.recv()
+        except (EOFError, OSError):
+            self.close()
+            raise SandboxCrashed(
+                f"evaluation process exited with code {self.process.exitcode}"
+            )
+        if status == "error":
+            raise SandboxCrashed(payload)
+        return payload
+
+    @property
+    def alive(self) -> bool:
+        return not self.conn.closed and self.process.is_alive()
+
+    def close(self) -> None:
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class SandboxPool:
+    """Runs sandboxed calls concurrently, one child process per call.
+
+    Each worker thread only waits on its child, so throughput scales with the number
+    of processes the machine can run side by side. With reuse_workers, the children
+    are kept and run one call after another instead; only a child that timed out or
+    died is replaced. That saves a process start per call and keeps module state,
+    but a call can see what earlier calls left behind.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        limits: SandboxLimits | None = None,
+        reuse_workers: bool = False,
+    ):
+        self.limits = limits or SandboxLimits()
+        self.reuse_workers = reuse_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+        self._idle: list[_Worker] = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args: Any):
+        if self.reuse_workers:
+            return self.executor.submit(self._call_worker, fn, args)
+        return self.executor.submit(run_in_sandbox, fn, *args, limits=self.limits)
+
+    def _call_worker(self, fn: Callable, args: tuple) -> Any:
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None:
+            worker = _Worker(fn.__module__, self.limits.memory_limit_mb)
+        try:
+            return worker.call(fn, args, self.limits.timeout_seconds)
+        finally:
+            if worker.alive:
+                with self._lock:
+                    self._idle.append(worker)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+    def __enter__(self) -> "SandboxPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
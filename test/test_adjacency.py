@@ -0,0 +1,82 @@
+import random
+import time
+
+import numpy as np
+import pytest
+
+from dsl.graph_dsl import cycle_graph, path_graph
+from dsl.samples import TEST_GRAPHS
+from dsl.utils import (
+    from_adjacency_matrix,
+    from_csr,
+    from_edge_array,
+    from_graph,
+    to_csr,
+    to_edge_array,
+)
+
+
+def _reference_from_graph(graph):
+    vertices, edges = graph
+    n = len(vertices)
+    index_of = {v: i for i, v in enumerate(vertices)}
+    matrix = [[0 for _ in range(n)] for _ in range(n)]
+    for a, b in edges:
+        if a not in index_of or b not in index_of:
+            continue
+        matrix[index_of[a]][index_of[b]] = 1
+        matrix[index_of[b]][index_of[a]] = 1
+    return matrix
+
+
+def _reference_from_matrix(matrix):
+    n = len(matrix)
+    return (
+        list(range(n)),
+        [(i, j) for i in range(n) for j in range(i, n) if matrix[i][j] == 1],
+    )
+
+
+def _random_graph(seed):
+    rng = random.Random(seed)
+    vertices = [rng.randrange(-5, 30) for _ in range(rng.randrange(0, 20))]
+    edges = [(rng.randrange(-5, 30), rng.randrange(-5, 30)) for _ in range(30)]
+    return (vertices, edges)
+
+
+def test_from_graph_matches_reference():
+    graphs = [fn() for fn in TEST_GRAPHS] + [_random_graph(s) for s in range(50)]
+    graphs.append(([3, 1, 3], [(1, 3), (3, 3)]))
+    for g in graphs:
+        matrix = from_graph(g)
+        assert matrix == _reference_from_graph(g)
+        assert from_adjacency_matrix(matrix) == _reference_from_matrix(matrix)
+        assert from_adjacency_matrix(np.array(matrix)) == _reference_from_matrix(
+            matrix
+        )
+
+
+def test_sparse_paths_agree_with_dense():
+    for g in [fn() for fn in TEST_GRAPHS] + [_random_graph(s) for s in range(20)]:
+        expected = from_adjacency_matrix(from_graph(g))
+        n, edges = to_edge_array(g)
+        assert from_edge_array(n, edges) == expected
+        assert from_csr(*to_csr(g)) == expected
+
+
+def test_asymmetric_matrices_are_rejected():
+    with pytest.raises(ValueError, match=r"\(0,1\): 1 != 0"):
+        from_adjacency_matrix([[0, 1], [0, 0]])
+    indptr, indices = np.array([0, 1, 1]), np.array([1])
+    with pytest.raises(ValueError, match="not symmetric"):
+        from_csr(indptr, indices)
+
+
+def test_large_sparse_conversion_is_fast():
+    g = (list(range(10_000)), path_graph(10_000)[1] + cycle_graph(0, 10_000, 7)[1])
+    start = time.perf_counter()
+    n, edges = to_edge_array(g)
+    graph = from_csr(*to_csr(g))
+    assert time.perf_counter() - start < 1.0
+    assert n == 10_000
+    assert len(edges) == len(graph[1]) == 9_999 + 1_429
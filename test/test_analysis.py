@@ -0,0 +1,112 @@
+import eval as ev
+from dsl.analysis import analyze_program
+from dsl.dsl import parse_program
+from dsl.families import FamilyInstance, family_instances
+from dsl.graph_dsl import (  # noqa: F401  the programs below use them
+    complete_graph,
+    connect_one_to_all,
+    cycle_graph,
+    merge_vertices,
+    numerical_range,
+    path_graph,
+    shift_graph,
+    union_graphs,
+    union_map,
+)
+from dsl.samples import TEST_GRAPHS
+from dsl.utils import from_graph
+from utils import ChatResult, Sample, Usage
+
+
+def _counts(graph):
+    vertices, edges = graph
+    normalized = set(frozenset(e) for e in edges)
+    return len(set(vertices).union(*normalized)), len(normalized)
+
+
+def test_bounds_hold_for_every_sample_and_family():
+    for fn in [*TEST_GRAPHS, *(i.builder() for i in family_instances(sizes=(10,)))]:
+        bound = analyze_program(parse_program(fn)).result
+        assert bound is not None, fn.__name__
+        assert bound.mismatch(*_counts(fn())) is None, fn.__name__
+
+
+def test_long_union_maps_are_not_unrolled():
+    for instance in family_instances(sizes=(100,)):
+        fn = instance.builder()
+        bound = analyze_program(parse_program(fn)).result
+        assert bound is None or bound.mismatch(*_counts(fn())) is None, fn.__name__
+    prism = FamilyInstance("prism", 10_000).builder()
+    assert analyze_program(parse_program(prism)).result is None
+
+
+def merged_into_a_loop():
+    g = connect_one_to_all(1, 0, 1)
+    return merge_vertices(g, 0, 1)
+
+
+def test_merges_may_collapse_edges_into_a_self_loop():
+    bound = analyze_program(parse_program(merged_into_a_loop)).result
+    assert merged_into_a_loop() == ([0], [(0, 0)])
+    assert bound.mismatch(*_counts(merged_into_a_loop())) is None
+
+
+def exact_generators():
+    g1 = complete_graph(0, 5)
+    g2 = shift_graph(cycle_graph(6), 10)
+    stars = union_map(numerical_range(3), lambda i: connect_one_to_all(20 + 4 * i, *numerical_range(21 + 4 * i, 24 + 4 * i)))
+    return union_graphs(g1, g2, stars)
+
+
+def keyword_arguments():
+    return path_graph(0, end=10)
+
+
+def reassigned():
+    g = complete_graph(0, 5)
+    g = g
+    return g
+
+
+def test_disjoint_generators_are_exact_and_unfaithful_programs_unknown():
+    bound = analyze_program(parse_program(exact_generators)).result
+    assert (bound.min_vertices, bound.max_vertices) == (23, 23)
+    assert (bound.min_edges, bound.max_edges) == (25, 25)
+
+    assert analyze_program(parse_program(keyword_arguments)).result is None
+    assert analyze_program(parse_program(reassigned)).result is None
+
+
+def _grade(body: str, expected, backend: str = "python"):
+    sample = Sample("g", from_graph(expected), 1, 1, 1.0, "")
+    response = ChatResult(
+        model="test",
+        content=f"```python\ndef compress():\n    return {body}\n```",
+        finish_reason="stop",
+        usage=Usage(0, 0, 0, 0, 0),
+        id="test",
+    )
+    return ev.evaluate_chat_result(response, sample, 0, expected, backend)
+
+
+def test_wrong_sizes_and_memory_bombs_never_run():
+    result = _grade("cycle_graph(7)", cycle_graph(6))
+    assert isinstance(result, ev.IncorrectReconstruction)
+    assert result.equality_stage == "static_vertex_count"
+    assert "compress" not in result.profile.seconds
+
+    result = _grade("complete_graph(0, 10 ** 6)", cycle_graph(6))
+    assert isinstance(result, ev.InvalidDSL)
+    assert "more than the limit" in result.error
+    assert "compress" not in result.profile.seconds
+
+    assert isinstance(_grade("cycle_graph(6)", cycle_graph(6)), ev.Success)
+
+
+def test_the_edge_budget_only_applies_to_materializing_backends():
+    body = "complete_graph(0, 20000)"
+    assert isinstance(_grade(body, cycle_graph(6)), ev.InvalidDSL)
+
+    result = _grade(body, cycle_graph(6), backend="lazy")
+    assert isinstance(result, ev.IncorrectReconstruction)
+    assert result.equality_stage == "static_vertex_count"
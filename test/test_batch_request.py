@@ -0,0 +1,136 @@
+"""batch_request against a local stand-in for the chat completions endpoint.
+
+The user prompt tells the server how to behave, e.g. "throttle:2" answers 429 twice
+before succeeding. Anything after "#" only makes prompts distinct.
+"""
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+
+import pytest
+from openai import AsyncOpenAI
+
+from rate_limiter import RateLimiter
+from utils import batch_request, ChatResult, ChatFailure, RetryPolicy
+
+FAST_RETRIES = RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.05)
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stand-in",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+
+
+class StandInServer(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.calls: Counter[str] = Counter()
+        self.lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StandInServer
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        with self.server.lock:
+            self.server.calls[prompt] += 1
+            call = self.server.calls[prompt]
+
+        mode, _, arg = prompt.split("#")[0].partition(":")
+        error = {"error": {"message": mode, "type": mode}}
+        if mode == "throttle" and call <= int(arg):
+            return self._reply(429, error, {"retry-after-ms": "10"})
+        if mode == "flaky" and call <= int(arg):
+            return self._reply(503, error)
+        if mode == "bad":
+            return self._reply(400, error)
+        if mode == "down":
+            return self._reply(500, error)
+        return self._reply(200, _completion(f"answer to {prompt}"))
+
+
+@pytest.fixture
+def server():
+    srv = StandInServer()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _client(srv: StandInServer) -> AsyncOpenAI:
+    host, port = srv.server_address
+    return AsyncOpenAI(
+        api_key="test", base_url=f"http://{host}:{port}/v1", max_retries=0
+    )
+
+
+def test_transient_errors_are_retried_and_failures_returned(server):
+    prompts = ["ok", "throttle:2", "flaky:1", "bad", "down"]
+    results = batch_request(
+        "system",
+        prompts,
+        model="stand-in",
+        reasoning_effort="",
+        stagger_seconds=0,
+        retry_policy=FAST_RETRIES,
+        client=_client(server),
+    )
+
+    for prompt, result in zip(prompts[:3], results[:3]):
+        assert isinstance(result, ChatResult)
+        assert result.content == f"answer to {prompt}"
+    assert server.calls["throttle:2"] == 3
+    assert server.calls["flaky:1"] == 2
+
+    bad, down = results[3], results[4]
+    assert isinstance(bad, ChatFailure)
+    assert (bad.status_code, bad.attempts) == (400, 1)
+    assert server.calls["bad"] == 1
+    assert isinstance(down, ChatFailure)
+    assert (down.status_code, down.attempts) == (500, FAST_RETRIES.max_attempts)
+
+
+def test_large_throttled_batch_completes(server):
+    prompts = [f"throttle:{i % 3}#{i}" for i in range(60)]
+    results = batch_request(
+        "system",
+        prompts,
+        model="stand-in",
+        reasoning_effort="",
+        rate_limiter=RateLimiter(requests_per_minute=100_000, max_in_flight=8),
+        retry_policy=FAST_RETRIES,
+        client=_client(server),
+    )
+    assert all(isinstance(r, ChatResult) for r in results)
+    assert sum(server.calls.values()) == sum(1 + i % 3 for i in range(60))
@@ -0,0 +1,23 @@
+from benchmarks.suite import CASES, Timing, compare, load_results, run_suite, save_results
+
+
+def _timing(case: str, best_s: float, size: int = 10) -> Timing:
+    return Timing(case, size, "python", 1, best_s, best_s)
+
+
+def test_every_case_runs_and_round_trips(tmp_path):
+    timings = run_suite(sizes=(10,), repeat=1)
+    assert [t.case for t in timings] == [c.name for c in CASES]
+    assert all(t.best_s > 0 for t in timings)
+
+    path = tmp_path / "bench.json"
+    save_results(timings, path)
+    assert load_results(path) == timings
+
+
+def test_compare_flags_only_cases_past_the_threshold():
+    baseline = [_timing("a", 1.0), _timing("b", 1.0), _timing("c", 1.0, size=100)]
+    current = [_timing("a", 1.2), _timing("b", 2.0), _timing("d", 9.0)]
+
+    (regression,) = compare(current, baseline, threshold=1.25)
+    assert (regression.case, regression.ratio) == ("b", 2.0)
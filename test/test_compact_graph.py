@@ -0,0 +1,112 @@
+import inspect
+
+import dsl.graph_dsl as py
+import dsl.compact_graph as cg
+from dsl.compact_graph import CompactGraph, to_compact
+from dsl.backends import get_graph_dsl
+from dsl.graph_dsl import Graph
+from dsl.samples import TEST_GRAPHS
+from dsl.utils import are_graphs_equal, from_graph, get_naive_cost
+
+
+def _normalized(graph):
+    vertices, edges = cg.to_graph(graph)
+    return set(vertices), set((min(a, b), max(a, b)) for a, b in edges)
+
+
+def test_round_trip():
+    g = py.union_graphs(py.cycle_graph(5), py.connect_one_to_all(7, 0, 2))
+    compact = to_compact(g)
+    assert isinstance(compact, CompactGraph)
+    assert compact.edges.shape == (len(g[1]), 2)
+    assert _normalized(compact.to_graph()) == _normalized(g)
+
+
+def test_constructors_match_tuple_graphs():
+    for name, args in [
+        ("path_graph", (0, 6)),
+        ("path_graph", (1,)),
+        ("path_graph", (0, 12, 6)),
+        ("complete_graph", (5,)),
+        ("complete_graph", (2, 9, 2)),
+        ("cycle_graph", (8,)),
+        ("cycle_graph", (0, 2)),
+        ("cycle_graph", (1, 8, 2)),
+        ("connect_one_to_all", (5, 0, 1, 2)),
+        ("fully_connect", (0, 4, 5, 9)),
+    ]:
+        expected = getattr(py, name)(*args)
+        actual = getattr(cg, name)(*args)
+        assert _normalized(actual) == _normalized(expected), (name, args)
+
+
+def test_operations_match_tuple_graphs():
+    base = py.union_graphs(py.path_graph(0, 7), py.path_graph(7, 14))
+    compact = to_compact(base)
+    cases = [
+        ("shift_graph", (4,)),
+        ("merge_vertices", (3, 10)),
+        ("merge_vertices", (3, 99)),
+        ("remove_vertex", (3,)),
+        ("add_edges", ((0, 20), (5, 2))),
+        ("add_edges", ((1, 0), (20, 0))),
+        ("remove_edges", ((0, 1), (8, 7))),
+    ]
+    for name, args in cases:
+        expected = getattr(py, name)(base, *args)
+        actual = getattr(cg, name)(compact, *args)
+        assert isinstance(actual, CompactGraph)
+        assert _normalized(actual) == _normalized(expected), (name, args)
+        assert get_naive_cost(actual) == get_naive_cost(expected), (name, args)
+
+    expected = py.union_map(
+        py.numerical_range(5), lambda i: py.connect_one_to_all(0, 2 * i + 1)
+    )
+    actual = cg.union_map(
+        cg.numerical_range(5), lambda i: cg.connect_one_to_all(0, 2 * i + 1)
+    )
+    assert _normalized(actual) == _normalized(expected)
+
+
+def test_utils_accept_compact_graphs():
+    g = py.cycle_graph(6)
+    compact = cg.cycle_graph(6)
+    assert are_graphs_equal(compact, g)
+    assert from_graph(compact) == from_graph(g)
+
+
+def _run_under_backend(fn, backend):
+    env = {f.__name__: f for f in get_graph_dsl(backend).functions}
+    env["Graph"] = Graph
+    exec(inspect.getsource(fn), env)
+    return env[fn.__name__]()
+
+
+def test_backends_agree_on_all_samples():
+    for fn in TEST_GRAPHS:
+        python_graph = _run_under_backend(fn, "python")
+        numpy_graph = _run_under_backend(fn, "numpy")
+        assert isinstance(numpy_graph, CompactGraph)
+        assert _normalized(numpy_graph) == _normalized(python_graph), fn.__name__
+        assert get_naive_cost(numpy_graph) == get_naive_cost(python_graph), fn.__name__
+
+
+def test_packed_keys_handle_negative_and_wide_vertices():
+    g = cg.union_graphs(cg.path_graph(-3, 2), cg.connect_one_to_all(2**40, -3))
+    g = cg.remove_edges(g, (-2, -3), (-3, 2**40))
+    assert _normalized(g) == (
+        {-3, -2, -1, 0, 1, 2**40},
+        {(-2, -1), (-1, 0), (0, 1)},
+    )
+
+
+def test_programs_keep_list_semantics():
+    assert cg.vertices(3) + [5] == py.vertices(3) + [5]
+    ranges = cg.numerical_range(2) + cg.numerical_range(5, 7)
+    assert _normalized(cg.fully_connect(*ranges)) == _normalized(
+        py.fully_connect(*ranges)
+    )
+
+    v, e = cg.cycle_graph(4)
+    assert v == [0, 1, 2, 3]
+    assert sorted(e) == [(0, 1), (0, 3), (1, 2), (2, 3)]
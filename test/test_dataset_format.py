@@ -0,0 +1,98 @@
+import numpy as np
+
+import generate_eval_data
+from generate_eval_data import build_datapoint
+from dsl.samples import TEST_GRAPHS
+from dsl.families import family_instances
+from dsl.utils import from_edge_array, from_graph, to_edge_array
+from utils import Sample, load_npz_dataset, save_npz_dataset
+
+
+def test_npz_round_trip_matches_matrix_samples(tmp_path):
+    datapoints = [build_datapoint(fn.__name__, fn) for fn in TEST_GRAPHS]
+    path = tmp_path / "dataset.npz"
+    save_npz_dataset(datapoints, path)
+    loaded = load_npz_dataset(path)
+
+    assert [s.name for s in loaded] == [dp["name"] for dp in datapoints]
+    for fn, dp, s in zip(TEST_GRAPHS, datapoints, loaded):
+        matrix = from_graph(fn())
+        from_json = Sample(**(dp | {"adjacency_matrix": matrix, "edges": None}))
+        assert s.adjacency_matrix is None
+        assert s.matrix() == matrix
+        assert s.matrix_json() == from_json.matrix_json()
+        assert s.graph() == from_json.graph()
+        assert s.digest() == from_json.digest()
+        assert (s.dsl_cost, s.naive_cost, s.code) == (
+            dp["dsl_cost"],
+            dp["naive_cost"],
+            dp["code"],
+        )
+
+
+def test_npz_accepts_edge_lists(tmp_path):
+    path = tmp_path / "dataset.npz"
+    datapoint = {
+        "name": "isolated",
+        "num_vertices": 4,
+        "edges": [(0, 2)],
+        "dsl_cost": 1,
+        "naive_cost": 2,
+        "compression_ratio": 2.0,
+        "code": "",
+    }
+    save_npz_dataset([datapoint], path)
+    (s,) = load_npz_dataset(path)
+    assert s.graph() == ([0, 1, 2, 3], [(0, 2)])
+    assert s.matrix()[2] == [1, 0, 0, 0]
+
+
+def test_save_dataset_only_rebuilds_changed_builders(tmp_path, monkeypatch):
+    path = tmp_path / "dataset.npz"
+    builders = [(fn.__name__, fn) for fn in TEST_GRAPHS[:4]]
+    assert generate_eval_data.save_dataset(builders, path, max_workers=2) == [
+        name for name, _ in builders
+    ]
+    first = load_npz_dataset(path)
+    assert generate_eval_data.save_dataset(builders, path) == []
+
+    changed = builders[1][0]
+    real_hash = generate_eval_data.source_hash
+    monkeypatch.setattr(
+        generate_eval_data,
+        "source_hash",
+        lambda fn, version: real_hash(fn, version + (fn.__name__ == changed) * "x"),
+    )
+    assert generate_eval_data.save_dataset(builders[:3], path) == [changed]
+    assert load_npz_dataset(path) == first[:3]
+
+
+def test_family_instances_build_through_the_process_pool(tmp_path):
+    path = tmp_path / "scaling.npz"
+    builders = [(inst.name, inst) for inst in family_instances(sizes=(10, 100))]
+    assert generate_eval_data.save_dataset(builders, path, max_workers=2) == [
+        name for name, _ in builders
+    ]
+    for (_, inst), s in zip(builders, load_npz_dataset(path)):
+        assert s.name == inst.name
+        assert abs(s.num_vertices - inst.size) <= max(3, inst.size // 10)
+        # Crowns spell out the removed matching edge by edge, as crown_6 does.
+        if inst.size >= 100 and inst.family != "crown":
+            assert s.dsl_cost < s.naive_cost
+        assert s.graph() == from_edge_array(*to_edge_array(inst.builder()()))
+    assert generate_eval_data.save_dataset(builders, path) == []
+
+
+def test_npz_edges_are_memory_mapped(tmp_path):
+    datapoints = [build_datapoint(fn.__name__, fn) for fn in TEST_GRAPHS]
+    path = tmp_path / "dataset.npz"
+    save_npz_dataset(datapoints, path)
+    loaded = load_npz_dataset(path)
+    assert all(isinstance(s.edges, np.memmap) for s in loaded if len(s.edges))
+
+    compressed = tmp_path / "compressed.npz"
+    with np.load(path) as data:
+        np.savez_compressed(compressed, **data)
+    assert load_npz_dataset(compressed) == loaded
+    for s, c in zip(loaded, load_npz_dataset(compressed)):
+        assert np.array_equal(s.edges, c.edges)
@@ -1,5 +1,20 @@
-from dsl.dsl import parse_program, get_program_cost
+import inspect
+
+import pytest
+
+from dsl.backends import GRAPH_DSL_BACKENDS
+from dsl.compact_graph import to_graph
+from dsl.dsl import (
+    parse_program,
+    get_program_cost,
+    parse_program_source,
+    program_fingerprint,
+    run_program,
+)
+from dsl.samples import TEST_GRAPHS
+from dsl.utils import are_graphs_equal
 from dsl.graph_dsl import (
+    GRAPH_DSL,
     cycle_graph,
     union_graphs,
     path_graph,
@@ -342,3 +357,71 @@ def test_p21():
     correct = 28  # 2 + 4 + 9 + 2 + 9 + 2
     output = get_program_cost(program)
     assert output == correct
+
+
+def test_source_programs_match_and_run_like_their_functions():
+    for fn in TEST_GRAPHS:
+        program = parse_program(fn)
+        from_source = parse_program_source(inspect.getsource(fn), fn.__name__)
+        assert from_source.instructions == program.instructions
+        assert (from_source.targets, from_source.result) == (
+            program.targets,
+            program.result,
+        )
+        assert from_source.exact, fn.__name__
+        for dsl in GRAPH_DSL_BACKENDS.values():
+            assert are_graphs_equal(to_graph(run_program(from_source, dsl)), fn())
+
+
+def test_only_faithful_sources_are_exact():
+    def exact(source):
+        return parse_program_source(source).exact
+
+    assert exact("def compress():\n    g = path_graph(0, 2 * 3)\n    return g\n")
+    assert exact('"""doc"""\ndef compress():\n    return cycle_graph(*range(2))\n')
+    # keyword arguments are dropped by the parser
+    assert not exact("def compress():\n    return path_graph(0, end=6)\n")
+    # so are assignments of anything but a call
+    assert not exact("def compress():\n    g = 5\n    return cycle_graph(g)\n")
+    # module-level code can redefine DSL functions
+    assert not exact(
+        "cycle_graph = path_graph\ndef compress():\n    return cycle_graph(5)\n"
+    )
+    assert not exact("def compress():\n    return cycle_graph(sorted([5])[0])\n")
+    assert not exact("def compress():\n    cycle_graph(5)\n")
+
+    with pytest.raises(KeyError):
+        parse_program_source("def other():\n    return cycle_graph(5)\n")
+    with pytest.raises(NameError):
+        source = "def compress():\n    return cyc(5)\n"
+        run_program(parse_program_source(source), GRAPH_DSL)
+    with pytest.raises(UnboundLocalError):
+        source = (
+            "def compress():\n"
+            "    h = shift_graph(g, 1)\n"
+            "    g = cycle_graph(3)\n"
+            "    return h\n"
+        )
+        run_program(parse_program_source(source), GRAPH_DSL)
+
+
+def test_fingerprints_ignore_formatting_and_local_names():
+    source = (
+        "def compress():\n"
+        '    """Five spokes."""\n'
+        "    hub = connect_one_to_all(0, 1, 2)  # three spokes\n"
+        "    return union_map(numerical_range(2), lambda k: shift_graph(hub, 3 * k))\n"
+    )
+    renamed = (
+        "def compress():\n"
+        "    s = connect_one_to_all(0,1,2)\n\n"
+        "    return union_map(numerical_range(2), lambda i: shift_graph(s, 3*i))\n"
+    )
+    assert program_fingerprint(source) == program_fingerprint(renamed)
+    # DSL functions, constants and argument order all count
+    for changed in (
+        renamed.replace("connect_one_to_all", "fully_connect"),
+        renamed.replace("3*i", "4*i"),
+        renamed.replace("(0,1,2)", "(1,0,2)"),
+    ):
+        assert program_fingerprint(changed) != program_fingerprint(renamed)
@@ -0,0 +1,100 @@
+from dsl.graph_dsl import (
+    union_graphs,
+    union_map,
+    numerical_range,
+    connect_one_to_all,
+    fully_connect,
+    shift_graph,
+    complete_graph,
+    cycle_graph,
+    path_graph,
+    merge_vertices,
+    remove_vertex,
+)
+
+
+def _fold_union_map(items, fn):
+    acc = ([], [])
+    for x in items:
+        acc = union_graphs(acc, fn(x))
+    return acc
+
+
+def test_union_map_matches_fold():
+    cases = [
+        (numerical_range(5), lambda i: connect_one_to_all(0, 2 * i + 1, 2 * i + 2)),
+        (numerical_range(8), lambda k: fully_connect(0, 2 * k + 1, 2 * k + 2)),
+        (numerical_range(4), lambda i: shift_graph(complete_graph(0, 4), i * 3)),
+        (numerical_range(50), lambda i: connect_one_to_all(i, i + 1)),
+    ]
+    for items, fn in cases:
+        assert union_map(items, fn) == _fold_union_map(items, fn)
+
+
+def test_union_map_empty():
+    assert union_map(numerical_range(0), lambda i: connect_one_to_all(i)) == ([], [])
+
+
+def _reference_merge(graph, v1, v2):
+    vertices, edges = graph
+    if v1 not in vertices or v2 not in vertices or v1 == v2:
+        return graph
+    new_vertices = [v for v in vertices if v != v2]
+    new_edges = set()
+    for a, b in edges:
+        a = v1 if a == v2 else a
+        b = v1 if b == v2 else b
+        new_edges.add((min(a, b), max(a, b)))
+    return (new_vertices, sorted(new_edges))
+
+
+def _reference_remove(graph, v):
+    vertices, edges = graph
+    new_vertices = [a for a in vertices if a != v]
+    return (new_vertices, [(a, b) for a, b in edges if v not in (a, b)])
+
+
+def test_merge_and_remove_chains_match_reference():
+    g = union_graphs(path_graph(0, 12), path_graph(12, 24), cycle_graph(24, 36))
+    g = union_graphs(g, connect_one_to_all(30, 0, 11, 5))
+    expected = g
+    ops = [
+        ("merge", 0, 12),
+        ("merge", 0, 24),
+        ("remove", 5),
+        ("merge", 11, 23),
+        ("merge", 11, 30),
+        ("merge", 11, 11),
+        ("merge", 11, 99),
+        ("remove", 17),
+        ("remove", 99),
+        ("merge", 0, 11),
+    ]
+    for op, *args in ops:
+        if op == "merge":
+            g = merge_vertices(g, *args)
+            expected = _reference_merge(expected, *args)
+        else:
+            g = remove_vertex(g, *args)
+            expected = _reference_remove(expected, *args)
+        assert g[0] == expected[0]
+        assert sorted(g[1]) == sorted(expected[1])
+        assert len(set(g[1])) == len(g[1])
+
+
+def test_remove_vertex_keeps_edge_order():
+    g = connect_one_to_all(5, 3, 0, 4)
+    assert remove_vertex(g, 0) == ([5, 3, 4], [(5, 3), (5, 4)])
+
+
+def test_results_are_plain_lists_that_can_be_mutated():
+    g = merge_vertices(path_graph(0, 5), 0, 4)
+    assert type(g[0]) is list and type(g[1]) is list
+    g[1].append((1, 3))
+    g = merge_vertices(g, 1, 3)
+    assert g[0] == [0, 1, 2]
+    assert sorted(g[1]) == [(0, 1), (1, 1), (1, 2)]
+
+    g = remove_vertex(path_graph(0, 5), 4)
+    g[0].append(9)
+    assert merge_vertices(g, 0, 9)[0] == [0, 1, 2, 3]
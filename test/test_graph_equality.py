@@ -0,0 +1,132 @@
+from collections import Counter
+import random
+
+import networkx as nx
+
+from dsl.graph_dsl import cycle_graph, path_graph, union_graphs, connect_one_to_all
+from dsl.samples import TEST_GRAPHS
+from dsl import canonical
+from dsl.canonical import graph_certificate, compare_with_certificate
+from dsl.utils import compare_graphs, are_graphs_equal, from_graph
+
+
+def _relabel(graph, seed):
+    vertices, edges = graph
+    perm = list(vertices)
+    random.Random(seed).shuffle(perm)
+    mapping = dict(zip(vertices, perm))
+    new_edges = [(mapping[a], mapping[b]) for a, b in edges]
+    return ([mapping[v] for v in vertices], new_edges)
+
+
+def test_stages():
+    c6 = cycle_graph(6)
+    assert compare_graphs(c6, cycle_graph(6)).stage == "labeled"
+    assert compare_graphs(c6, cycle_graph(7)).stage == "vertex_count"
+    assert compare_graphs(c6, path_graph(6)).stage == "edge_count"
+
+    # Same counts, different degrees.
+    star = connect_one_to_all(0, 1, 2, 3)
+    assert compare_graphs(path_graph(4), star).stage == "degree_sequence"
+
+    # Both 2-regular on 6 vertices, C6 has no triangles.
+    two_triangles = union_graphs(cycle_graph(3), cycle_graph(3, 6))
+    assert compare_graphs(c6, two_triangles).stage == "triangles"
+
+    result = compare_graphs(c6, _relabel(c6, seed=0))
+    assert result.equal
+    assert result.stage in ("labeled", "isomorphism")
+
+
+def test_cascade_agrees_with_vf2_on_samples():
+    graphs = [(fn.__name__, fn()) for fn in TEST_GRAPHS]
+    for i, (name, g) in enumerate(graphs):
+        assert are_graphs_equal(g, _relabel(g, seed=i)), name
+
+    for (name1, g1), (name2, g2) in zip(graphs, graphs[1:]):
+        nx_g1 = nx.Graph(g1[1])
+        nx_g1.add_nodes_from(g1[0])
+        nx_g2 = nx.Graph(g2[1])
+        nx_g2.add_nodes_from(g2[0])
+        assert are_graphs_equal(g1, g2) == nx.is_isomorphic(nx_g1, nx_g2), (
+            name1,
+            name2,
+        )
+
+
+def test_certificates_agree_with_cascade_on_samples():
+    graphs = [(fn.__name__, fn()) for fn in TEST_GRAPHS]
+    certificates = [graph_certificate(g) for _, g in graphs]
+    for i, ((name, g), cert) in enumerate(zip(graphs, certificates)):
+        assert compare_with_certificate(_relabel(g, seed=i), g, cert).equal, name
+
+    pairs = zip(graphs, graphs[1:], certificates[1:])
+    for (name1, g1), (name2, g2), cert2 in pairs:
+        result = compare_with_certificate(g1, g2, cert2)
+        assert result.equal == are_graphs_equal(g1, g2), (name1, name2)
+
+
+def test_certificate_cache_round_trip(tmp_path):
+    from eval import load_expected_certificates
+    from utils import Sample
+
+    samples = [
+        Sample(
+            name=fn.__name__,
+            adjacency_matrix=from_graph(fn()),
+            dsl_cost=0,
+            naive_cost=0,
+            compression_ratio=0.0,
+            code="",
+        )
+        for fn in TEST_GRAPHS[:5]
+    ]
+    cache_path = tmp_path / "certificates.json"
+    first = load_expected_certificates(samples, cache_path=cache_path)
+    assert cache_path.exists()
+    assert load_expected_certificates(samples, cache_path=cache_path) == first
+
+
+def test_certificate_path_does_no_more_work_than_cascade_on_samples(monkeypatch):
+    """Counts VF2 runs and refinement steps instead of timing the two paths;
+    benchmarks/suite.py times them."""
+    graphs = [fn() for fn in TEST_GRAPHS]
+    certificates = [graph_certificate(g) for g in graphs]
+    answers = graphs + [_relabel(g, seed=i) for i, g in enumerate(graphs)]
+    expected = graphs + graphs
+    calls = Counter()
+
+    def counting(name, fn):
+        def call(*args, **kwargs):
+            calls[name] += 1
+            return fn(*args, **kwargs)
+
+        return call
+
+    monkeypatch.setattr(canonical, "_refine", counting("refine", canonical._refine))
+    is_isomorphic = nx.is_isomorphic
+    monkeypatch.setattr(nx, "is_isomorphic", counting("vf2", is_isomorphic))
+
+    for answer, g in zip(answers, expected):
+        assert compare_graphs(answer, g).equal
+    cascade_vf2 = calls.pop("vf2", 0)
+
+    for answer, g, cert in zip(answers, expected, certificates + certificates):
+        before = calls["refine"]
+        assert compare_with_certificate(answer, g, cert).equal
+        # every visited node of the search tree lies on the way to a leaf
+        depth = canonical.MAX_CANONICAL_VERTICES
+        assert calls["refine"] - before <= (canonical.MAX_SEARCH_LEAVES + 1) * depth
+    assert calls["vf2"] <= cascade_vf2
+    # labeled answers never search
+    for g, cert in zip(graphs, certificates):
+        before = calls["refine"]
+        assert compare_with_certificate(g, g, cert).stage == "labeled"
+        assert calls["refine"] == before
+
+
+def test_certificate_path_skips_search_on_large_symmetric_graphs():
+    g = cycle_graph(400)
+    result = compare_with_certificate(_relabel(g, seed=0), g, graph_certificate(g))
+    assert result.equal
+    assert result.stage == "isomorphism"
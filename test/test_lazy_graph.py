@@ -0,0 +1,60 @@
+import inspect
+import time
+
+import dsl.graph_dsl as py
+import dsl.lazy_graph as lz
+from dsl.backends import get_graph_dsl
+from dsl.graph_dsl import Graph, cycle_graph
+from dsl.lazy_graph import LazyGraph
+from dsl.samples import TEST_GRAPHS
+from dsl.canonical import compare_with_certificate, graph_certificate
+from dsl.utils import _degree_sequence, compare_graphs
+
+
+def _run_under_backend(fn, backend):
+    env = {f.__name__: f for f in get_graph_dsl(backend).functions}
+    env["Graph"] = Graph
+    exec(inspect.getsource(fn), env)
+    return env[fn.__name__]()
+
+
+def _invariants(graph):
+    vertices, edges = lz.to_lazy(graph).to_graph()
+    normalized = set(frozenset([a, b]) for a, b in edges)
+    nodes = set(vertices).union(*normalized)
+    return len(nodes), len(normalized), _degree_sequence(nodes, normalized)
+
+
+def test_symbolic_counts_match_the_materialized_graph_on_all_samples():
+    for fn in TEST_GRAPHS:
+        lazy = _run_under_backend(fn, "lazy")
+        assert isinstance(lazy, LazyGraph)
+        assert compare_graphs(lazy.to_graph(), fn()).stage == "labeled", fn.__name__
+        counts = (lazy.num_vertices, lazy.num_edges, lazy.degree_sequence())
+        assert counts == _invariants(lazy), fn.__name__
+
+
+def test_shapes_compose_without_materializing():
+    crown = lz.remove_edges(lz.complete_graph(0, 6), (0, 3), (1, 4), (3, 0), (0, 9))
+    star = lz.connect_one_to_all(20, 21, 23)
+    g = lz.union_graphs(crown, lz.shift_graph(crown, 6), star)
+    assert g.disjoint
+    counts = (g.num_vertices, g.num_edges, g.degree_sequence())
+    assert "_compact" not in vars(g)
+    assert counts == _invariants(g)
+
+    stepped = lz.path_graph(0, 12, 6)
+    assert compare_graphs(stepped, py.path_graph(0, 12, 6)).equal
+    assert lz.fully_connect(4, 0, 2).parts[0].shape == lz.Clique(range(0, 6, 2))
+
+
+def test_huge_wrong_answer_is_rejected_on_its_counts():
+    expected = cycle_graph(6)
+    answer = lz.complete_graph(0, 20000)
+
+    start = time.perf_counter()
+    assert compare_graphs(answer, expected).stage == "vertex_count"
+    certificate = graph_certificate(expected)
+    assert compare_with_certificate(answer, expected, certificate).stage == "vertex_count"
+    assert time.perf_counter() - start < 1
+    assert "_compact" not in vars(answer)
@@ -0,0 +1,107 @@
+import inspect
+
+import eval as ev
+from dsl.backends import GRAPH_DSL_BACKENDS
+from dsl.compact_graph import to_graph
+from dsl.dsl import parse_program_source, run_program
+from dsl.graph_dsl import GRAPH_DSL, cycle_graph
+from dsl.memo import MemoCache, memoized_dsl
+from dsl.samples import TEST_GRAPHS
+from dsl.utils import are_graphs_equal, from_graph
+from utils import ChatResult, Sample, Usage
+
+
+def _functions(cache):
+    return {f.__name__: f for f in memoized_dsl(GRAPH_DSL, cache).functions}
+
+
+def test_repeated_subterms_are_computed_once():
+    cache = MemoCache()
+    f = _functions(cache)
+
+    g = f["complete_graph"](0, 5)
+    assert f["complete_graph"](0, 5) is g
+    shifted = f["shift_graph"](g, 5)
+    # keyed by g's serial, not by its edges
+    assert f["shift_graph"](f["complete_graph"](0, 5), 5) is shifted
+    assert f["union_graphs"](g, shifted) is f["union_graphs"](g, shifted)
+    # graphs built elsewhere are keyed by content
+    assert f["shift_graph"](cycle_graph(4), 1) is f["shift_graph"](cycle_graph(4), 1)
+    # the lambda can't be keyed, the calls it makes can
+    f["union_map"]([0, 1], lambda i: f["complete_graph"](0, 5))
+
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.uncached) == (7, 4, 1)
+
+
+def test_the_cache_is_a_bounded_lru():
+    cache = MemoCache(maxsize=2)
+    f = _functions(cache)
+    c3, c4 = f["cycle_graph"](3), f["cycle_graph"](4)
+    f["cycle_graph"](3)
+    f["cycle_graph"](5)  # evicts cycle_graph(4), used least recently
+
+    assert len(cache) == 2
+    assert f["cycle_graph"](3) is c3
+    assert f["cycle_graph"](4) is not c4
+    assert len(cache._serials) == len(cache)
+
+
+def test_memoized_programs_build_the_same_graphs():
+    for name, dsl in GRAPH_DSL_BACKENDS.items():
+        cache = MemoCache(maxsize=64)
+        memoized = memoized_dsl(dsl, cache)
+        for _ in range(2):
+            for fn in TEST_GRAPHS:
+                program = parse_program_source(inspect.getsource(fn), fn.__name__)
+                graph = to_graph(run_program(program, memoized))
+                assert are_graphs_equal(graph, fn()), (name, fn.__name__)
+        assert cache.stats.hits > 0
+
+
+def test_graded_responses_report_their_lookups(monkeypatch):
+    monkeypatch.setattr(ev, "MEMO_CACHES", {})
+    expected = cycle_graph(6)
+    sample = Sample("c6", from_graph(expected), 1, 1, 1.0, "")
+    response = ChatResult(
+        model="test",
+        content="```python\ndef compress():\n    return cycle_graph(6)\n```",
+        finish_reason="stop",
+        usage=Usage(0, 0, 0, 0, 0),
+        id="test",
+    )
+
+    def grade():
+        return ev.evaluate_chat_result(
+            response, sample, 0, expected, memoize=True
+        )
+
+    first, second = grade(), grade()
+    assert isinstance(second, ev.Success)
+    assert (first.profile.memo.hits, first.profile.memo.misses) == (0, 1)
+    assert (second.profile.memo.hits, second.profile.memo.misses) == (1, 0)
+    assert "Memo hit rate 50% of 2 DSL calls" in ev.summarize_profiles([first, second])
+
+
+def _identity(graph):
+    return graph
+
+
+def test_evicting_a_result_keeps_it_keyed_while_another_entry_holds_it():
+    cache = MemoCache(maxsize=2)
+    f = _functions(cache)
+    g = f["complete_graph"](0, 5)
+    # a second entry holding the same graph
+    assert cache.call(_identity, (g,)) is g
+    f["cycle_graph"](3)  # evicts complete_graph(0, 5)
+
+    assert cache._key(g) == ("result", 0)
+
+
+def test_heavy_results_are_not_kept():
+    cache = MemoCache(max_weight=20)
+    f = _functions(cache)
+    big = f["complete_graph"](0, 10)  # 10 vertices and 45 edges
+    assert f["complete_graph"](0, 10) is not big
+    f["cycle_graph"](6)
+    f["cycle_graph"](7)  # together over the bound, evicts cycle_graph(6)
+    assert len(cache) == 1 and cache.weight == 14
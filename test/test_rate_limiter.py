@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+import rate_limiter as rl
+from rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_per_minute(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rl.time, "monotonic", clock)
+    bucket = TokenBucket(per_minute=60)
+
+    bucket.consume(60)
+    assert bucket.wait_time(1) == 1.0
+    clock.now = 0.5
+    assert bucket.wait_time(1) == 0.5
+    clock.now = 30
+    assert bucket.wait_time(30) == 0.0
+    # Requests larger than the bucket only wait for a full bucket.
+    assert bucket.wait_time(1000) == 30.0
+
+
+def test_token_usage_is_reconciled(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rl.time, "monotonic", clock)
+    limiter = RateLimiter(tokens_per_minute=10_000)
+
+    async def _run():
+        async with limiter.limit(4000) as reservation:
+            assert limiter.tokens.level == 6000
+            reservation.used_tokens = 1000
+        assert limiter.tokens.level == 9000
+
+        async with limiter.limit(1000) as reservation:
+            reservation.used_tokens = 5000
+        assert limiter.tokens.level == 4000
+
+    asyncio.run(_run())
+
+
+def test_max_in_flight():
+    limiter = RateLimiter(requests_per_minute=10_000, max_in_flight=2)
+    in_flight = 0
+    peak = 0
+
+    async def _request():
+        nonlocal in_flight, peak
+        async with limiter.limit(0):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def _run():
+        await asyncio.gather(*(_request() for _ in range(8)))
+
+    # A second event loop reuses the same limiter.
+    asyncio.run(_run())
+    asyncio.run(_run())
+    assert peak == 2
+
+
+def test_child_limiters_share_parent_budget():
+    # Real clock: faking time.monotonic would also freeze the event loop's sleeps.
+    parent = RateLimiter(tokens_per_minute=10_000, max_in_flight=3)
+    a = RateLimiter(max_in_flight=2, parent=parent)
+    b = RateLimiter(max_in_flight=2, parent=parent)
+    in_flight = {"a": 0, "b": 0}
+    peaks = {"a": 0, "b": 0, "total": 0}
+
+    async def _request(name, limiter):
+        async with limiter.limit(100) as reservation:
+            in_flight[name] += 1
+            peaks[name] = max(peaks[name], in_flight[name])
+            peaks["total"] = max(peaks["total"], sum(in_flight.values()))
+            await asyncio.sleep(0.01)
+            in_flight[name] -= 1
+            reservation.used_tokens = 50
+
+    async def _run():
+        await asyncio.gather(
+            *(_request("a", a) for _ in range(4)),
+            *(_request("b", b) for _ in range(4)),
+        )
+
+    asyncio.run(_run())
+    assert peaks == {"a": 2, "b": 2, "total": 3}
+    # Actual usage was settled against the parent's token budget too.
+    assert parent.tokens.level == pytest.approx(10_000 - 8 * 50, abs=10)
@@ -0,0 +1,114 @@
+from collections import Counter
+
+from openai.types.chat import ChatCompletion
+
+from utils import (
+    batch_request,
+    response_cache_key,
+    ChatResult,
+    ChatFailure,
+    ResponseCache,
+    RetryPolicy,
+)
+
+
+class FakeClient:
+    """Stands in for AsyncOpenAI; every call gets a distinct answer."""
+
+    def __init__(self, fail: set[str] = frozenset()):
+        self.calls: Counter[str] = Counter()
+        self.fail = fail
+        self.chat = self
+        self.completions = self
+
+    async def create(self, *, model, messages, temperature, **kwargs):
+        prompt = messages[-1]["content"]
+        self.calls[prompt] += 1
+        if prompt in self.fail:
+            raise ValueError("rejected")
+        return ChatCompletion.model_validate(
+            {
+                "id": f"{prompt}-{self.calls[prompt]}",
+                "object": "chat.completion",
+                "created": 0,
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": prompt.upper()},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 3,
+                    "completion_tokens": 2,
+                    "total_tokens": 5,
+                },
+            }
+        )
+
+
+def _batch(prompts, client, cache, **kwargs):
+    return batch_request(
+        "system",
+        prompts,
+        model=kwargs.pop("model", "m"),
+        reasoning_effort="",
+        stagger_seconds=0,
+        retry_policy=RetryPolicy(max_attempts=1),
+        client=client,
+        cache=cache,
+        **kwargs,
+    )
+
+
+def test_second_run_is_served_from_cache(tmp_path):
+    prompts = ["a", "b", "a"]
+    cache = ResponseCache(tmp_path)
+    first = _batch(prompts, FakeClient(), cache)
+
+    assert cache.summary() == "Served 0 of 3 responses from cache."
+
+    client = FakeClient()
+    second_cache = ResponseCache(tmp_path)
+    second = _batch(prompts, client, second_cache)
+    assert sum(client.calls.values()) == 0
+    assert second_cache.summary() == "Served 3 of 3 responses from cache."
+    assert second == first
+    assert all(isinstance(r, ChatResult) for r in second)
+    # Repeats of the same prompt are cached separately.
+    assert first[0].id != first[2].id
+
+
+def test_cache_key_covers_request_parameters(tmp_path):
+    cache = ResponseCache(tmp_path)
+    _batch(["a"], FakeClient(), cache)
+
+    client = FakeClient()
+    _batch(["a"], client, cache, model="other")
+    _batch(["a"], client, cache, temperature=0.5)
+    _batch(["a", "a"], client, cache)
+    assert client.calls["a"] == 3
+
+    base = dict(
+        model="m",
+        reasoning_effort="",
+        temperature=1.0,
+        system_prompt="system",
+        user_prompt="a",
+        sample_index=0,
+    )
+    assert response_cache_key(**base) != response_cache_key(
+        **(base | {"system_prompt": "changed"})
+    )
+
+
+def test_failures_are_not_cached(tmp_path):
+    cache = ResponseCache(tmp_path)
+    results = _batch(["ok", "bad"], FakeClient(fail={"bad"}), cache)
+    assert isinstance(results[1], ChatFailure)
+
+    client = FakeClient()
+    results = _batch(["ok", "bad"], client, cache)
+    assert client.calls == Counter({"bad": 1})
+    assert all(isinstance(r, ChatResult) for r in results)
@@ -0,0 +1,79 @@
+import json
+
+import eval as ev
+from dsl.memo import MemoStats
+from dsl.graph_dsl import path_graph
+from dsl.utils import from_graph
+from results_store import (
+    ResultsStore,
+    load_results_frame,
+    payload_row,
+    result_payload,
+    stage_summary,
+)
+from utils import ChatResult, Usage, Sample
+
+SAMPLE = Sample("p4", from_graph(path_graph(4)), 1, 4, 4.0, "")
+RESPONSE = ChatResult("m", "", "stop", Usage(3, 0, 2, 2, 5), "id")
+
+
+def _row(repeat, status=ev.InvalidDSL, error="error"):
+    result = ev.InvalidDSL(SAMPLE, 0, RESPONSE, error)
+    return payload_row(result_payload(result, status), repeat)
+
+
+def test_rows_are_batched_and_latest_wins(tmp_path):
+    store = ResultsStore(tmp_path, flush_every=2)
+    store.append(_row(0))
+    assert not store.segment.exists()
+    store.append(_row(1))
+    assert len(store.segment.read_text().splitlines()) == 2
+
+    store.append(_row(1, error="second"))
+    assert store.keys() == {("p4", 0), ("p4", 1)}
+    store.close()
+
+    df = ResultsStore(tmp_path).load()
+    assert list(df["repeat"]) == [0, 1]
+    assert list(df["error"]) == ["error", "second"]
+    assert list(df["prompt_tokens"]) == [3, 3]
+    payload = json.loads(df["payload"][0])
+    assert payload["status"] == "InvalidDSL"
+    assert "adjacency_matrix" not in payload["sample"]
+
+
+def test_compaction_folds_segments_and_legacy_files(tmp_path):
+    model_dir = tmp_path / "model__high"
+    model_dir.mkdir()
+    legacy = result_payload(ev.InvalidDSL(SAMPLE, 0, RESPONSE, "old"), ev.InvalidDSL)
+    (model_dir / "p4__3.json").write_text(json.dumps(legacy))
+    with ResultsStore(model_dir) as store:
+        store.append(_row(0))
+
+    store = ResultsStore(model_dir)
+    before = store.load()
+    store.compact()
+    assert not list(model_dir.glob("*.json"))
+    assert not list((model_dir / "segments").iterdir())
+    assert store.keys() == {("p4", 0), ("p4", 3)}
+
+    after = load_results_frame(tmp_path)
+    assert list(after["model"]) == ["model__high", "model__high"]
+    assert sorted(after["repeat"]) == sorted(before["repeat"])
+    assert sorted(after["error"]) == ["error", "old"]
+
+
+def test_stage_profiles_become_columns_and_summarize_per_model(tmp_path):
+    for model, seconds, memo in (("a", 1.0, MemoStats(3, 1)), ("b", 3.0, None)):
+        profile = ev.StageProfile({"compress": seconds}, {"compress": 2048}, memo)
+        result = ev.InvalidDSL(SAMPLE, 0, RESPONSE, "error", profile)
+        with ResultsStore(tmp_path / model) as store:
+            store.append(payload_row(result_payload(result, ev.InvalidDSL), 0))
+
+    frame = load_results_frame(tmp_path)
+    assert list(frame["seconds_compress"]) == [1.0, 3.0]
+    summary = stage_summary(frame)
+    assert summary.loc["b", "seconds_compress"] == 3.0
+    assert summary.loc["a", "peak_bytes_compress"] == 2048
+    assert summary.loc["a", "memo_hit_rate"] == 0.75
+    assert summary["memo_hit_rate"].isna()["b"]
@@ -0,0 +1,209 @@
+import asyncio
+import json
+
+import pytest
+
+import eval as ev
+import utils
+from dsl.graph_dsl import cycle_graph, path_graph
+from dsl.utils import from_graph
+from sandbox import SandboxLimits, SandboxPool
+from utils import ChatResult, Usage, Sample, construct_prompt
+
+
+def _chat(body: str) -> ChatResult:
+    return ChatResult(
+        model="test",
+        content=f"```python\ndef compress():\n    return {body}\n```",
+        finish_reason="stop",
+        usage=Usage(0, 0, 0, 0, 0),
+        id="test",
+    )
+
+
+SAMPLES = [
+    Sample("c6", from_graph(cycle_graph(6)), 1, 7, 7.0, ""),
+    Sample("p4", from_graph(path_graph(4)), 1, 4, 4.0, ""),
+]
+ANSWERS = {"c6": _chat("cycle_graph(6)"), "p4": _chat("cycle_graph(4)")}
+NAME_OF_PROMPT = {
+    construct_prompt(graph=json.dumps(s.adjacency_matrix))[1]: s.name for s in SAMPLES
+}
+
+
+@pytest.fixture
+def harness(monkeypatch):
+    events = []
+
+    def fake_log_result(
+        model, effort, result, status, *, skip_if_exists=False, repeat=0, store=None
+    ):
+        events.append(("logged", result.sample.name, status.__name__, repeat))
+
+    def fake_stream(fail_after=None):
+        async def _stream(system_prompt, user_prompts, **kwargs):
+            for i, prompt in enumerate(user_prompts):
+                if fail_after is not None and i == fail_after:
+                    raise RuntimeError("connection dropped")
+                name = NAME_OF_PROMPT[prompt]
+                events.append(("received", name, kwargs["sample_indices"][i]))
+                yield i, ANSWERS[name]
+
+        return _stream
+
+    monkeypatch.setattr(ev, "log_result", fake_log_result)
+    monkeypatch.setattr(
+        ev,
+        "load_expected_certificates",
+        lambda samples: [None for _ in samples],
+    )
+    return events, fake_stream, monkeypatch
+
+
+def test_results_are_logged_as_they_stream_in(harness):
+    events, fake_stream, monkeypatch = harness
+    monkeypatch.setattr(ev, "stream_requests", fake_stream())
+    config = ev.Config(
+        model="test",
+        reasoning_effort="",
+        num_samples=2,
+        dedup=False,
+        trace_memory=True,
+    )
+
+    with SandboxPool(max_workers=2, limits=SandboxLimits(timeout_seconds=30)) as pool:
+        results = ev.run_evaluation(config, SAMPLES, pool=pool)
+
+    assert [len(r.responses) for r in results] == [2, 2]
+    assert all(isinstance(r, ev.Success) for r in results[0].responses)
+    assert all(
+        isinstance(r, ev.IncorrectReconstruction) for r in results[1].responses
+    )
+    assert sum(1 for e in events if e[0] == "logged") == 4
+    for r in results[0].responses:
+        interpreted = [s for s in ev.EVALUATION_STAGES if s != "exec"]
+        assert list(r.profile.seconds) == interpreted
+        assert set(r.profile.peak_bytes) == set(interpreted)
+
+
+def test_profile_only_covers_stages_that_ran():
+    sample = SAMPLES[0]
+    invalid = ev.evaluate_chat_result(
+        _chat("undefined_name(6)"), sample, 0, sample.graph()
+    )
+    assert isinstance(invalid, ev.InvalidDSL)
+    assert list(invalid.profile.seconds) == [
+        "parse_response",
+        "parse_program",
+        "cost",
+        "analyze",
+        "compress",
+    ]
+    # memory is only traced when asked for, the process peak is always there
+    assert invalid.profile.peak_bytes == {}
+    assert invalid.profile.max_rss_bytes > 0
+
+
+def test_inexact_programs_are_executed():
+    sample = SAMPLES[0]
+    result = ev.evaluate_chat_result(
+        _chat("cycle_graph(0, end=6)"), sample, 0, sample.graph()
+    )
+    assert isinstance(result, ev.Success)
+    assert "exec" in result.profile.seconds
+
+
+def test_arrived_results_survive_a_failing_stream(harness):
+    events, fake_stream, monkeypatch = harness
+    monkeypatch.setattr(ev, "stream_requests", fake_stream(fail_after=3))
+    config = ev.Config(model="test", reasoning_effort="", num_samples=2)
+
+    with SandboxPool(max_workers=2, limits=SandboxLimits(timeout_seconds=30)) as pool:
+        with pytest.raises(RuntimeError, match="connection dropped"):
+            ev.run_evaluation(config, SAMPLES, pool=pool)
+
+    assert sum(1 for e in events if e[0] == "logged") == 3
+
+
+def test_duplicate_programs_are_graded_once(harness):
+    events, _, monkeypatch = harness
+    variants = [
+        "def compress():\n    g = cycle_graph(6)\n    return g\n",
+        "def compress():\n    # a ring\n    ring = cycle_graph( 6 )\n    return ring\n",
+        "def compress():\n    g = cycle_graph(7)\n    return g\n",
+    ]
+
+    async def _stream(system_prompt, user_prompts, **kwargs):
+        for i, source in enumerate(variants):
+            yield i, ChatResult("test", f"```python\n{source}```", "stop", None, str(i))
+
+    monkeypatch.setattr(ev, "stream_requests", _stream)
+    config = ev.Config(model="test", reasoning_effort="", num_samples=3)
+
+    with SandboxPool(max_workers=2, limits=SandboxLimits(timeout_seconds=30)) as pool:
+        (result,) = ev.run_evaluation(config, SAMPLES[:1], pool=pool)
+
+    first, renamed, other = result.responses
+    assert isinstance(first, ev.Success) and isinstance(renamed, ev.Success)
+    assert isinstance(other, ev.IncorrectReconstruction)
+    assert renamed.response.id == "1"
+    assert first.profile is not None and other.profile is not None
+    assert renamed.profile is None
+    assert sum(1 for e in events if e[0] == "logged") == 3
+
+
+def test_resume_only_dispatches_missing_repeats(harness):
+    events, fake_stream, monkeypatch = harness
+    monkeypatch.setattr(ev, "stream_requests", fake_stream())
+    monkeypatch.setattr(
+        ev, "completed_results", lambda model, effort: {("c6", 0), ("p4", 1)}
+    )
+    config = ev.Config(model="test", reasoning_effort="", num_samples=2)
+
+    with SandboxPool(max_workers=2, limits=SandboxLimits(timeout_seconds=30)) as pool:
+        results = ev.run_evaluation(config, SAMPLES, pool=pool, resume=True)
+
+    assert [len(r.responses) for r in results] == [1, 1]
+    assert sorted(e for e in events if e[0] == "received") == [
+        ("received", "c6", 1),
+        ("received", "p4", 0),
+    ]
+    assert sorted(e[1::2] for e in events if e[0] == "logged") == [
+        ("c6", 1),
+        ("p4", 0),
+    ]
+
+
+def test_completed_results_reads_logged_file_names(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_results_dir", lambda model, effort: tmp_path)
+    result = ev.InvalidDSL(SAMPLES[1], 1, ANSWERS["p4"], "error")
+    for repeat in (0, 2):
+        utils.log_result("test", "", result, ev.InvalidDSL, repeat=repeat)
+    assert utils.completed_results("test", "") == {("p4", 0), ("p4", 2)}
+
+
+def test_sweep_runs_configs_concurrently(harness):
+    events, _, monkeypatch = harness
+    streaming = set()
+    both_streaming = asyncio.Event()
+
+    async def _stream(system_prompt, user_prompts, **kwargs):
+        streaming.add(kwargs["model"])
+        if len(streaming) == 2:
+            both_streaming.set()
+        # Only returns if the other config is streaming at the same time.
+        await asyncio.wait_for(both_streaming.wait(), timeout=10)
+        assert kwargs["client"] is client
+        for i, prompt in enumerate(user_prompts):
+            yield i, ANSWERS[NAME_OF_PROMPT[prompt]]
+
+    monkeypatch.setattr(ev, "stream_requests", _stream)
+    client = object()
+    configs = [
+        ev.Config(model="a", reasoning_effort="", num_samples=1),
+        ev.Config(model="b", reasoning_effort="", num_samples=1),
+    ]
+    results = ev.run_sweep(configs, SAMPLES, client=client)
+
+    assert [[len(r.responses) for r in rs] for rs in results] == [[1, 1], [1, 1]]
+    assert sum(1 for e in events if e[0] == "logged") == 4
@@ -0,0 +1,108 @@
+import time
+
+import pytest
+
+from dsl.graph_dsl import cycle_graph
+from eval import evaluate_chat_result, sandboxed_result, Success, Timeout, InvalidDSL
+from sandbox import (
+    SandboxLimits,
+    SandboxPool,
+    SandboxTimeout,
+    SandboxCrashed,
+    run_in_sandbox,
+)
+from utils import ChatResult, Usage, Sample
+
+# Children of a cold forkserver may still have to import the DSL, keep some slack.
+LIMITS = SandboxLimits(timeout_seconds=5.0, memory_limit_mb=1024)
+
+
+def _square(x):
+    return x * x
+
+
+def _sleep_forever():
+    while True:
+        time.sleep(1)
+
+
+def _allocate(mb):
+    return len(bytearray(mb * 1024 * 1024))
+
+
+def _chat(code: str) -> ChatResult:
+    return ChatResult(
+        model="test",
+        content=f"```python\n{code}\n```",
+        finish_reason="stop",
+        usage=Usage(0, 0, 0, 0, 0),
+        id="test",
+    )
+
+
+SAMPLE = Sample(
+    name="c6",
+    adjacency_matrix=[],
+    dsl_cost=1,
+    naive_cost=7,
+    compression_ratio=7.0,
+    code="",
+)
+
+
+def test_run_in_sandbox():
+    assert run_in_sandbox(_square, 7, limits=LIMITS) == 49
+    with pytest.raises(SandboxTimeout):
+        run_in_sandbox(_sleep_forever, limits=SandboxLimits(timeout_seconds=1.0))
+    with pytest.raises(SandboxCrashed, match="MemoryError"):
+        run_in_sandbox(_allocate, 4096, limits=LIMITS)
+
+
+def test_pool_grades_responses():
+    responses = [
+        _chat("def compress():\n    return cycle_graph(6)"),
+        _chat("def compress():\n    return complete_graph(10**6)"),
+        _chat(
+            "def compress():\n"
+            "    return union_map(numerical_range(10**7), lambda i: path_graph(0, 2))"
+        ),
+    ]
+    with SandboxPool(max_workers=3, limits=LIMITS) as pool:
+        futures = [
+            pool.submit(evaluate_chat_result, r, SAMPLE, 0, cycle_graph(6))
+            for r in responses
+        ]
+        results = [
+            sandboxed_result(f, r, SAMPLE, 0, pool)
+            for f, r in zip(futures, responses)
+        ]
+
+    assert isinstance(results[0], Success)
+    assert isinstance(results[1], (InvalidDSL, Timeout))
+    assert isinstance(results[2], Timeout)
+    assert results[2].limit_seconds == LIMITS.timeout_seconds
+
+
+def test_reused_workers_keep_memo_caches_and_replace_stuck_workers():
+    response = _chat("def compress():\n    return cycle_graph(6)")
+    limits = SandboxLimits(timeout_seconds=5.0, memory_limit_mb=1024)
+    with SandboxPool(max_workers=1, limits=limits, reuse_workers=True) as pool:
+
+        def grade():
+            # positional: backend, expected_certificate, trace_memory, memoize
+            args = (response, SAMPLE, 0, cycle_graph(6), "python", None, False, True)
+            future = pool.submit(evaluate_chat_result, *args)
+            return sandboxed_result(future, response, SAMPLE, 0, pool)
+
+        first, second = grade(), grade()
+        assert isinstance(second, Success)
+        assert first.profile.memo.misses == 1
+        assert second.profile.memo.hits == 1
+
+        pool.limits.timeout_seconds = 1.0
+        with pytest.raises(SandboxTimeout):
+            pool.submit(_sleep_forever).result()
+        pool.limits.timeout_seconds = 5.0
+        assert pool.submit(_square, 7).result() == 49
+        # the stuck worker was replaced, so the caches start over
+        assert grade().profile.memo.hits == 0
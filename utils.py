@@ -1,13 +1,33 @@
-from dataclasses import dataclass, asdict, is_dataclass
+from dataclasses import dataclass, asdict, field, fields
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import hashlib
 import json
-from typing import Any
+import os
+import random
+import struct
+import zipfile
+from collections import Counter
+from typing import Any, AsyncIterator
 from pathlib import Path
 import re
 
-from openai import OpenAI, AsyncOpenAI
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    APIStatusError,
+    APITimeoutError,
+    APIConnectionError,
+)
 from dotenv import load_dotenv
 import asyncio
 from tqdm import tqdm
+import numpy as np
+
+from dsl.graph_dsl import Graph
+from dsl.utils import from_adjacency_matrix, from_edge_array
+from rate_limiter import RateLimiter
+from results_store import ResultsStore, result_payload, payload_row
 
 load_dotenv()
 
@@ -101,7 +121,125 @@ def single_request(
     return _to_chat_result(response)
 
 
-def batch_request(
+@dataclass
+class ChatFailure:
+    """A request that still failed after all retries (or failed permanently)."""
+
+    error: str
+    attempts: int
+    status_code: int | None = None
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 6
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+
+TRANSIENT_STATUS_CODES = {408, 409, 429}
+
+
+def _status_code(e: Exception) -> int | None:
+    return e.status_code if isinstance(e, APIStatusError) else None
+
+
+def _is_transient(e: Exception) -> bool:
+    if isinstance(e, (APITimeoutError, APIConnectionError)):
+        return True
+    code = _status_code(e)
+    return code is not None and (code in TRANSIENT_STATUS_CODES or code >= 500)
+
+
+def _retry_after(e: Exception) -> float | None:
+    """Seconds the server asked us to wait, from retry-after-ms or retry-after."""
+    if not isinstance(e, APIStatusError):
+        return None
+    headers = e.response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                when = parsedate_to_datetime(value)
+                return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def _backoff_delay(attempt: int, policy: RetryPolicy, e: Exception) -> float:
+    """Retry-After if the server sent one, else full-jitter exponential backoff."""
+    retry_after = _retry_after(e)
+    if retry_after is not None:
+        return min(retry_after, policy.max_delay)
+    return random.uniform(0, min(policy.max_delay, policy.base_delay * 2**attempt))
+
+
+RESPONSE_CACHE_DIR = Path(__file__).resolve().parent / "cache" / "responses"
+
+
+def response_cache_key(
+    *,
+    model: str,
+    reasoning_effort: str,
+    temperature: float,
+    system_prompt: str,
+    user_prompt: str,
+    sample_index: int,
+) -> str:
+    """sample_index tells repeated requests for the same prompt apart, so a run with
+    num_samples > 1 caches every repeat instead of replaying the first one."""
+    fields = {
+        "model": model,
+        "reasoning_effort": reasoning_effort,
+        "temperature": temperature,
+        "system_prompt": hashlib.sha256(system_prompt.encode()).hexdigest(),
+        "user_prompt": user_prompt,
+        "sample_index": sample_index,
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """Completed chat responses on disk, one JSON file per request key.
+
+    Only successful completions are stored, so failed requests are sent again.
+    """
+
+    def __init__(self, directory: Path = RESPONSE_CACHE_DIR):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def summary(self) -> str:
+        return f"Served {self.hits} of {self.hits + self.misses} responses from cache."
+
+    def get(self, key: str) -> ChatResult | None:
+        try:
+            data = json.loads(self._path(key).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ChatResult(**(data | {"usage": Usage(**data["usage"])}))
+
+    def put(self, key: str, result: ChatResult) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so a crash mid-write never leaves a truncated entry.
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(asdict(result)))
+        os.replace(tmp, path)
+
+
+async def stream_requests(
     system_prompt: str,
     user_prompts: list[str],
     *,
@@ -109,57 +247,144 @@ def batch_request(
     reasoning_effort: str,
     temperature: float = 1.0,
     stagger_seconds: float = 1.0,
-) -> list[ChatResult]:
-    async def _run_batch() -> list[ChatResult]:
-        client = AsyncOpenAI()
+    rate_limiter: RateLimiter | None = None,
+    retry_policy: RetryPolicy | None = None,
+    client: AsyncOpenAI | None = None,
+    cache: ResponseCache | None = None,
+    sample_indices: list[int] | None = None,
+) -> AsyncIterator[tuple[int, ChatResult | ChatFailure]]:
+    """Yields (index into user_prompts, result) as soon as each completion arrives.
+
+    With a rate_limiter, requests go out as fast as its limits allow; without one,
+    request i is delayed by stagger_seconds * i. Throttling, timeouts and 5xx errors
+    are retried according to retry_policy; a request that still fails, or fails with
+    a non-transient error, is yielded as a ChatFailure instead of ending the stream.
+
+    With a cache, responses stored by an earlier run are yielded first without
+    touching the API, and every new completion is added to it. The cache tells
+    repeats of a prompt apart by their order in user_prompts unless sample_indices
+    gives each request's repeat number explicitly.
+    """
+    client = client or AsyncOpenAI(max_retries=0)
+    retry_policy = retry_policy or RetryPolicy()
+
+    keys: list[str | None] = [None] * len(user_prompts)
+    cached: dict[int, ChatResult] = {}
+    if cache is not None:
+        repeats: Counter[str] = Counter()
+        for i, user_prompt in enumerate(user_prompts):
+            keys[i] = response_cache_key(
+                model=model,
+                reasoning_effort=reasoning_effort,
+                temperature=temperature,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                sample_index=(
+                    sample_indices[i]
+                    if sample_indices is not None
+                    else repeats[user_prompt]
+                ),
+            )
+            repeats[user_prompt] += 1
+            hit = cache.get(keys[i])
+            if hit is not None:
+                cached[i] = hit
+
+    async def _request(user_prompt: str):
+        if reasoning_effort:
+            return await client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                temperature=temperature,
+                reasoning_effort=reasoning_effort,
+            )
+        return await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=temperature,
+        )
 
-        async def _request(index: int, user_prompt: str):
-            snippet = (user_prompt or "").strip().replace("\n", " ")[:80]
-            total = len(user_prompts)
-            try:
-                if reasoning_effort:
-                    response = await client.chat.completions.create(
-                        model=model,
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt},
-                        ],
-                        temperature=temperature,
-                        reasoning_effort=reasoning_effort,
-                    )
-                else:
-                    response = await client.chat.completions.create(
-                        model=model,
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt},
-                        ],
-                        temperature=temperature,
-                    )
-                return index, response
-            except Exception as e:
-                raise
+    async def _limited_request(user_prompt: str):
+        estimate = rate_limiter.estimate_tokens(system_prompt, user_prompt)
+        async with rate_limiter.limit(estimate) as reservation:
+            response = await _request(user_prompt)
+            reservation.used_tokens = response.usage.total_tokens
+        return response
 
-        async def _delayed_request(index: int, user_prompt: str):
-            delay = max(0.0, float(stagger_seconds)) * index
+    async def _request_with_retries(index: int, user_prompt: str, position: int):
+        if rate_limiter is None:
+            delay = max(0.0, float(stagger_seconds)) * position
             if delay > 0:
-                from asyncio import sleep
+                await asyncio.sleep(delay)
 
-                await sleep(delay)
-            return await _request(index, user_prompt)
+        send = _limited_request if rate_limiter is not None else _request
+        for attempt in range(retry_policy.max_attempts):
+            try:
+                result = _to_chat_result(await send(user_prompt))
+                if cache is not None:
+                    cache.put(keys[index], result)
+                return index, result
+            except Exception as e:
+                last_attempt = attempt + 1 == retry_policy.max_attempts
+                if last_attempt or not _is_transient(e):
+                    failure = ChatFailure(
+                        error=f"{type(e).__name__}: {e}",
+                        attempts=attempt + 1,
+                        status_code=_status_code(e),
+                    )
+                    return index, failure
+                await asyncio.sleep(_backoff_delay(attempt, retry_policy, e))
 
+    pending = [(i, up) for i, up in enumerate(user_prompts) if i not in cached]
+    tasks = [_request_with_retries(i, up, k) for k, (i, up) in enumerate(pending)]
+    total = len(user_prompts)
+    from asyncio import as_completed
 
-        tasks = [_delayed_request(i, up) for i, up in enumerate(user_prompts)]
-        total = len(tasks)
-        responses_by_index: list = [None] * total
-        from asyncio import as_completed
+    with tqdm(total=total, desc="batch", leave=True) as pbar:
+        for idx, resp in cached.items():
+            pbar.update(1)
+            yield idx, resp
+        for fut in as_completed(tasks):
+            idx, resp = await fut
+            pbar.update(1)
+            yield idx, resp
 
-        with tqdm(total=total, desc="batch", leave=True) as pbar:
-            for fut in as_completed(tasks):
-                idx, resp = await fut
-                responses_by_index[idx] = resp
-                pbar.update(1)
-        return [_to_chat_result(r) for r in responses_by_index]
+
+def batch_request(
+    system_prompt: str,
+    user_prompts: list[str],
+    *,
+    model: str,
+    reasoning_effort: str,
+    temperature: float = 1.0,
+    stagger_seconds: float = 1.0,
+    rate_limiter: RateLimiter | None = None,
+    retry_policy: RetryPolicy | None = None,
+    client: AsyncOpenAI | None = None,
+    cache: ResponseCache | None = None,
+) -> list[ChatResult | ChatFailure]:
+    async def _run_batch() -> list[ChatResult | ChatFailure]:
+        responses_by_index: list = [None] * len(user_prompts)
+        async for idx, resp in stream_requests(
+            system_prompt,
+            user_prompts,
+            model=model,
+            reasoning_effort=reasoning_effort,
+            temperature=temperature,
+            stagger_seconds=stagger_seconds,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            client=client,
+            cache=cache,
+        ):
+            responses_by_index[idx] = resp
+        return responses_by_index
 
     return asyncio.run(_run_batch())
 
@@ -207,24 +432,185 @@ def parse_response(response: str) -> Any:
 @dataclass
 class Sample:
     name: str
-    adjacency_matrix: list[list[int]]
+    adjacency_matrix: list[list[int]] | None
     dsl_cost: int
     naive_cost: int
     compression_ratio: float
     code: str
+    # Samples loaded from dataset.npz carry their upper-triangle edges instead of a
+    # matrix; the matrix is only rendered when a prompt needs it.
+    num_vertices: int | None = None
+    edges: np.ndarray | None = field(default=None, repr=False, compare=False)
+
+    def matrix(self) -> list[list[int]]:
+        if self.adjacency_matrix is not None:
+            return self.adjacency_matrix
+        n = self.num_vertices
+        m = np.zeros((n, n), dtype=np.int8)
+        m[self.edges[:, 0], self.edges[:, 1]] = 1
+        m[self.edges[:, 1], self.edges[:, 0]] = 1
+        return m.tolist()
+
+    def matrix_json(self) -> str:
+        return json.dumps(self.matrix())
+
+    def graph(self) -> Graph:
+        if self.edges is None:
+            return from_adjacency_matrix(self.adjacency_matrix)
+        return from_edge_array(self.num_vertices, self.edges)
+
+    def digest(self) -> str:
+        """Hash of the graph itself, the same whichever format the sample came from."""
+        vertices, edges = self.graph()
+        data = json.dumps([len(vertices), edges])
+        return hashlib.sha256(data.encode()).hexdigest()
+
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+DATASET_FILE = DATA_DIR / "dataset.npz"
+
+
+def save_npz_dataset(datapoints: list[dict[str, Any]], path: Path = DATASET_FILE) -> None:
+    """Writes build_datapoint dicts to one .npz file.
+
+    The edges of all graphs are stored back to back as one E x 2 int32 array of
+    upper-triangle (i, j) pairs, CSR style: graph k owns rows
+    edge_offsets[k]:edge_offsets[k + 1]. A datapoint may give "num_vertices" and
+    "edges" instead of an "adjacency_matrix", and a "source_hash" of the builder
+    it came from, which generate_eval_data uses to skip unchanged builders.
+    """
+    num_vertices, edge_arrays = [], []
+    for dp in datapoints:
+        if dp.get("adjacency_matrix") is not None:
+            vertices, edges = from_adjacency_matrix(dp["adjacency_matrix"])
+            num_vertices.append(len(vertices))
+            edge_arrays.append(np.asarray(edges, dtype=np.int64).reshape(-1, 2))
+        else:
+            num_vertices.append(dp["num_vertices"])
+            edge_arrays.append(np.asarray(dp["edges"]).reshape(-1, 2))
+    sizes = [len(e) for e in edge_arrays]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp.npz")
+    np.savez(
+        tmp,
+        names=np.array([dp["name"] for dp in datapoints], dtype=str),
+        code=np.array([dp["code"] for dp in datapoints], dtype=str),
+        dsl_cost=np.array([dp["dsl_cost"] for dp in datapoints], dtype=np.int64),
+        naive_cost=np.array([dp["naive_cost"] for dp in datapoints], dtype=np.int64),
+        compression_ratio=np.array(
+            [dp["compression_ratio"] for dp in datapoints], dtype=np.float64
+        ),
+        num_vertices=np.array(num_vertices, dtype=np.int64),
+        source_hashes=np.array(
+            [dp.get("source_hash", "") for dp in datapoints], dtype=str
+        ),
+        edge_offsets=np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64),
+        edges=(
+            np.concatenate(edge_arrays).astype(np.int32)
+            if edge_arrays
+            else np.empty((0, 2), dtype=np.int32)
+        ),
+    )
+    os.replace(tmp, path)
+
+
+def _mmap_npz_member(path: Path, name: str) -> np.ndarray | None:
+    """Member name of the .npz at path, memory-mapped read-only. np.savez stores its
+    members uncompressed, so the .npy bytes sit as they are inside the zip. None for
+    a compressed member."""
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(f"{name}.npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, "rb") as f:
+        # The local file header is 30 bytes, then the file name and extra field.
+        f.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack("<HH", f.read(4))
+        f.seek(name_length + extra_length, os.SEEK_CUR)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if not np.prod(shape):
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        shape=shape,
+        order="F" if fortran_order else "C",
+        offset=offset,
+    )
+
+
+def load_npz_datapoints(path: Path = DATASET_FILE) -> list[dict[str, Any]]:
+    """The datapoints written by save_npz_dataset, with each graph's edges as a slice
+    of the shared edge array.
+
+    Only the per-sample scalars are read up front. The edge array is memory-mapped,
+    so a sample's edges are paged in when they are first used.
+    """
+    with np.load(path) as data:
+        arrays = {k: data[k] for k in data.files if k != "edges"}
+        edges = _mmap_npz_member(path, "edges")
+        if edges is None:
+            edges = data["edges"]
+    offsets = arrays["edge_offsets"]
+    datapoints = []
+    for k, name in enumerate(arrays["names"]):
+        dp = {
+            "name": str(name),
+            "adjacency_matrix": None,
+            "dsl_cost": int(arrays["dsl_cost"][k]),
+            "naive_cost": int(arrays["naive_cost"][k]),
+            "compression_ratio": float(arrays["compression_ratio"][k]),
+            "code": str(arrays["code"][k]),
+            "num_vertices": int(arrays["num_vertices"][k]),
+            "edges": edges[offsets[k] : offsets[k + 1]],
+        }
+        if "source_hashes" in arrays:
+            dp["source_hash"] = str(arrays["source_hashes"][k])
+        datapoints.append(dp)
+    return datapoints
+
+
+def load_npz_dataset(path: Path = DATASET_FILE) -> list[Sample]:
+    sample_fields = {f.name for f in fields(Sample)}
+    return [
+        Sample(**{k: v for k, v in dp.items() if k in sample_fields})
+        for dp in load_npz_datapoints(path)
+    ]
 
 
 def get_samples() -> list[Sample]:
-    samples: list[Sample] = []
-    root = Path(__file__).resolve().parent
-    data_dir = root / "data"
-    for path in data_dir.iterdir():
-        data = load_json(str(path))
-        samples.append(Sample(**data))
-    assert len(samples) > 0, f"No samples found in {data_dir}"
+    """Reads data/dataset.npz if it exists, else the per-sample JSON files."""
+    if DATASET_FILE.exists():
+        samples = load_npz_dataset(DATASET_FILE)
+    else:
+        samples = [
+            Sample(**load_json(str(path))) for path in sorted(DATA_DIR.glob("*.json"))
+        ]
+    assert len(samples) > 0, f"No samples found in {DATA_DIR}"
     return samples
 
 
+def _results_dir(model_name: str, reasoning_effort: str) -> Path:
+    root = Path(__file__).resolve().parent
+    dir_name = f"{model_name}__{reasoning_effort}" if reasoning_effort else model_name
+    return root / "results" / dir_name
+
+
+def results_store(model_name: str, reasoning_effort: str) -> ResultsStore:
+    return ResultsStore(_results_dir(model_name, reasoning_effort))
+
+
+def completed_results(model_name: str, reasoning_effort: str) -> set[tuple[str, int]]:
+    """(sample name, repeat) of every result already logged for this model."""
+    return set(results_store(model_name, reasoning_effort).keys())
+
+
 def log_result(
     model_name: str,
     reasoning_effort: str,
@@ -232,17 +618,15 @@ def log_result(
     status: type[Any],
     *,
     skip_if_exists: bool = False,
+    repeat: int = 0,
+    store: ResultsStore | None = None,
 ) -> None:
-    root = Path(__file__).resolve().parent
-    dir_name = f"{model_name}__{reasoning_effort}" if reasoning_effort else model_name
-    out_dir = root / "results" / dir_name
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    payload = (asdict(result) if is_dataclass(result) else vars(result).copy()) | {
-        "status": status.__name__
-    }
-    name = payload["sample"]["name"]
-    out_path = out_dir / f"{name}.json"
-    if skip_if_exists and out_path.exists():
-        return
-    save_json(str(out_path), payload)
+    """Appends the result to store, which batches the writes. Without a store the
+    result is written straight away."""
+    owns_store = store is None
+    store = store or results_store(model_name, reasoning_effort)
+    name = result.sample.name
+    if not (skip_if_exists and (name, repeat) in store.keys()):
+        store.append(payload_row(result_payload(result, status), repeat))
+    if owns_store:
+        store.close()
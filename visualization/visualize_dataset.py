@@ -3,8 +3,13 @@ from __future__ import annotations  # my beloved
 from pathlib import Path
 import json
 import itertools
+import sys
 from flask import Flask
 
+# Run as `uv run visualization/visualize_dataset.py`, so the repo root is not on the path.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils import get_samples  # noqa: E402
+
 
 def matrix_to_elements(matrix: list[list[int]]):
     n = len(matrix)
@@ -23,23 +28,16 @@ app = Flask(__name__)
 @app.route("/")
 def index():
     root = Path(__file__).resolve().parent
-    data_dir = root.parent / "data"
     graphs = []
 
-    json_files = sorted(
-        p
-        for p in data_dir.iterdir()
-        if p.suffix == ".json" and p.name != "_dataset.json"
-    )
-    for p in json_files:
-        obj = json.loads(p.read_text())
+    for s in sorted(get_samples(), key=lambda s: s.name):
         graphs.append(
             {
-                "name": obj["name"],
-                "dsl_cost": obj["dsl_cost"],
-                "naive_cost": obj["naive_cost"],
-                "ratio": obj["compression_ratio"],
-                "elements": matrix_to_elements(obj["adjacency_matrix"]),
+                "name": s.name,
+                "dsl_cost": s.dsl_cost,
+                "naive_cost": s.naive_cost,
+                "ratio": s.compression_ratio,
+                "elements": matrix_to_elements(s.matrix()),
             }
         )
 
@@ -1,10 +1,16 @@
-import json
+from functools import cache
 from pathlib import Path
+import json
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 
+# Run as `uv run visualization/visualize_results.py`, so the repo root is not on the path.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from results_store import load_results_frame, stage_summary  # noqa: E402
+
 
 PLOT_CONFIG = {
     "dpi": 300,
@@ -13,6 +19,7 @@ PLOT_CONFIG = {
         "success": "green",
         "incorrect": "yellow",
         "invalid": "red",
+        "timeout": "orange",
         "missing": "gray",
         "dsl": "#06A77D",
         "naive": "#FF7F50",
@@ -23,38 +30,26 @@ PLOT_CONFIG = {
 }
 
 
-def load_results():
-    results_data = {}
-    results_dir = Path("results")
-
-    for model_dir in results_dir.iterdir():
-        if model_dir.is_dir():
-            model_name = model_dir.name.rstrip("__")
-            results_data[model_name] = {}
+@cache
+def load_results_df() -> pd.DataFrame:
+    """Every logged result, read once per process."""
+    df = load_results_frame()
+    return df.assign(model=df["model"].str.rstrip("__"))
 
-            for result_file in model_dir.glob("*.json"):
-                with open(result_file, "r") as f:
-                    data = json.load(f)
-                graph_name = data["sample"]["name"]
-                status = data["status"]
-                results_data[model_name][graph_name] = status
 
+def load_results():
+    results_data = {}
+    df = load_results_df()
+    for model_name, group in df.groupby("model", sort=False):
+        results_data[model_name] = dict(zip(group["name"], group["status"]))
     return results_data
 
 
 def load_detailed_results():
     detailed_results = {}
-    results_dir = Path("results")
-
-    for model_dir in results_dir.iterdir():
-        if model_dir.is_dir():
-            model_name = model_dir.name.rstrip("__")
-            detailed_results[model_name] = []
-
-            for result_file in model_dir.glob("*.json"):
-                with open(result_file, "r") as f:
-                    detailed_results[model_name].append(json.load(f))
-
+    df = load_results_df()
+    for model_name, group in df.groupby("model", sort=False):
+        detailed_results[model_name] = [json.loads(p) for p in group["payload"]]
     return detailed_results
 
 
@@ -115,6 +110,7 @@ def create_status_table():
     status_to_value = {
         "Success": 1,
         "IncorrectReconstruction": 0.5,
+        "Timeout": 0.25,
         "InvalidDSL": 0,
         "Missing": -1,
     }
@@ -127,10 +123,11 @@ def create_status_table():
     cmap = plt.cm.colors.ListedColormap([
         PLOT_CONFIG["colors"]["missing"],
         PLOT_CONFIG["colors"]["invalid"],
+        PLOT_CONFIG["colors"]["timeout"],
         PLOT_CONFIG["colors"]["incorrect"],
         PLOT_CONFIG["colors"]["success"],
     ])
-    norm = plt.cm.colors.BoundaryNorm([-1.5, -0.5, 0.25, 0.75, 1.5], cmap.N)
+    norm = plt.cm.colors.BoundaryNorm([-1.5, -0.5, 0.125, 0.375, 0.75, 1.5], cmap.N)
 
     im = ax.imshow(color_df.values, cmap=cmap, norm=norm, aspect="auto")
 
@@ -142,6 +139,7 @@ def create_status_table():
     legend_elements = [
         mpatches.Patch(color=PLOT_CONFIG["colors"]["success"], label="Success"),
         mpatches.Patch(color=PLOT_CONFIG["colors"]["incorrect"], label="Incorrect Reconstruction"),
+        mpatches.Patch(color=PLOT_CONFIG["colors"]["timeout"], label="Timeout"),
         mpatches.Patch(color=PLOT_CONFIG["colors"]["invalid"], label="Invalid DSL"),
         mpatches.Patch(color=PLOT_CONFIG["colors"]["missing"], label="Missing"),
     ]
@@ -167,12 +165,14 @@ def create_status_table():
         success = sum(1 for status in model_results.values() if status == "Success")
         incorrect = sum(1 for status in model_results.values() if status == "IncorrectReconstruction")
         invalid = sum(1 for status in model_results.values() if status == "InvalidDSL")
+        timeout = sum(1 for status in model_results.values() if status == "Timeout")
 
         print(f"\n{model}:")
         print(f"  Total graphs: {total}")
         print(f"  Success: {success} ({success/total*100:.1f}%)")
         print(f"  Incorrect Reconstruction: {incorrect} ({incorrect/total*100:.1f}%)")
         print(f"  Invalid DSL: {invalid} ({invalid/total*100:.1f}%)")
+        print(f"  Timeout: {timeout} ({timeout/total*100:.1f}%)")
 
 
 def create_cost_and_improvement_plot():
@@ -308,6 +308,59 @@ def create_median_dollar_cost_by_model_plot():
     plt.close()
 
 
+def create_stage_time_plot():
+    """Mean grading time per stage and largest peak memory per stage, by model."""
+    summary = stage_summary(load_results_df())
+    if summary.empty:
+        print("No stage timings logged yet.")
+        return
+    seconds = summary[[c for c in summary.columns if c.startswith("seconds_")]]
+    seconds = seconds.rename(columns=lambda c: c.removeprefix("seconds_"))
+    peaks = summary[[c for c in summary.columns if c.startswith("peak_bytes_")]]
+    peaks = peaks.rename(columns=lambda c: c.removeprefix("peak_bytes_")) / 2**20
+    seconds = seconds.loc[seconds.sum(axis=1).sort_values().index]
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, max(4, len(seconds) * 0.6)))
+    seconds.mul(1000).plot.barh(ax=ax1, stacked=True, alpha=PLOT_CONFIG["alpha"]["bar"])
+    ax1.set_xlabel("Mean ms per response", fontsize=PLOT_CONFIG["fontsize"]["label"])
+    ax1.set_title("Where grading time goes", fontsize=PLOT_CONFIG["fontsize"]["label"])
+    ax1.legend(fontsize=PLOT_CONFIG["fontsize"]["legend"])
+    ax1.grid(True, alpha=PLOT_CONFIG["alpha"]["grid"], axis="x")
+
+    peaks.loc[seconds.index].plot.barh(ax=ax2, alpha=PLOT_CONFIG["alpha"]["bar"])
+    ax2.set_xlabel("Peak MiB", fontsize=PLOT_CONFIG["fontsize"]["label"])
+    ax2.set_title("Largest peak memory per stage", fontsize=PLOT_CONFIG["fontsize"]["label"])
+    ax2.legend(fontsize=PLOT_CONFIG["fontsize"]["legend"])
+    ax2.grid(True, alpha=PLOT_CONFIG["alpha"]["grid"], axis="x")
+
+    plt.tight_layout()
+    Path("visualization/graph").mkdir(parents=True, exist_ok=True)
+    plt.savefig("visualization/graph/stage_times.png", **{k: PLOT_CONFIG[k] for k in ["dpi", "bbox_inches"]})
+    plt.close()
+
+
+def print_equality_stage_summary():
+    """How often each check in dsl.utils.compare_graphs decided a comparison."""
+    detailed = load_detailed_results()
+
+    print("\nGraph comparison stages:")
+    for model_name, items in sorted(detailed.items()):
+        stages = pd.Series(
+            [r["equality_stage"] for r in items if r.get("equality_stage")],
+            dtype=object,
+        )
+        if stages.empty:
+            continue
+        counts = stages.value_counts()
+        # Identical graphs never needed VF2 in the first place.
+        needed = len(stages) - int(counts.get("labeled", 0))
+        avoided = needed - int(counts.get("isomorphism", 0))
+        print(f"\n{model_name}:")
+        for stage, count in counts.items():
+            print(f"  {stage}: {count} ({count/len(stages)*100:.1f}%)")
+        print(f"  Full isomorphism checks avoided: {avoided} of {needed}")
+
+
 if __name__ == "__main__":
     print("Creating status table...")
     create_status_table()
@@ -318,4 +371,9 @@ if __name__ == "__main__":
     print("Creating median $ cost per task by model plot...")
     create_median_dollar_cost_by_model_plot()
 
+    print("Creating grading stage time plot...")
+    create_stage_time_plot()
+
+    print_equality_stage_summary()
+
     print("\nAll visualizations saved to visualization/graph/")